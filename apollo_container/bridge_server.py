@@ -0,0 +1,197 @@
+import socket
+import time
+from collections import defaultdict
+from threading import Condition, Event, Thread
+from typing import DefaultDict, List, Optional, Set, Tuple
+
+from cyber_record.record import Record
+
+from apollo_container.cyber_bridge import BridgeOp
+
+
+def to_32_le(n: int) -> bytes:
+    """
+    Converts int to 32 bit le integer
+
+    :param int n: integer to be converted
+
+    :returns: bytes representing a 32 bit integer
+    :rtype: bytes
+    """
+    return n.to_bytes(4, byteorder='little')
+
+
+class LocalBridgeServer:
+    """
+    Local stand-in for the cyber bridge of an Apollo container, speaking the
+    protocol of CyberBridge so that bridge clients can be tested without
+    Apollo. Messages published by the server, e.g. replayed from a record,
+    or by a client are sent to every client subscribed to their channel.
+
+    :param str host: IP address to listen on
+    :param int port: port to listen on, any free port if 0
+    """
+
+    sock: socket.socket
+    port: int
+    readers: DefaultDict[str, Set[socket.socket]]
+    published: List[Tuple[str, bytes]]
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        """
+        Constructor
+        """
+        self.sock = socket.create_server((host, port))
+        self.host = host
+        self.port = self.sock.getsockname()[1]
+        self.readers = defaultdict(set)
+        self.published = list()
+        self.clients: List[socket.socket] = list()
+        self.changed = Condition()
+        self.running = False
+
+    def start(self):
+        """
+        Starts accepting bridge clients
+        """
+        self.running = True
+        Thread(target=self._accept, daemon=True).start()
+
+    def stop(self):
+        """
+        Stops the server and disconnects every client
+        """
+        self.running = False
+        self.sock.close()
+        for conn in self.clients:
+            conn.close()
+
+    def _accept(self):
+        """
+        Helper function to accept clients, each served by its own thread
+        """
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.clients.append(conn)
+            Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _recv_exact(conn: socket.socket, n: int) -> Optional[bytes]:
+        """
+        Receives exactly n bytes, or None once the client disconnected
+        """
+        data = bytes()
+        while len(data) < n:
+            try:
+                chunk = conn.recv(n - len(data))
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _recv_field(self, conn: socket.socket) -> Optional[bytes]:
+        """
+        Receives a [length][data] field sent by a client
+        """
+        length = self._recv_exact(conn, 4)
+        if length is None:
+            return None
+        return self._recv_exact(conn, int.from_bytes(length, 'little'))
+
+    def _serve(self, conn: socket.socket):
+        """
+        Helper function to handle the operations of a client; every operation
+        is followed by two fields
+        """
+        while self.running:
+            op = self._recv_exact(conn, 1)
+            name = None if op is None else self._recv_field(conn)
+            data = None if name is None else self._recv_field(conn)
+            if data is None:
+                break
+            channel = name.decode('ascii')
+            with self.changed:
+                if op == BridgeOp.AddReader:
+                    self.readers[channel].add(conn)
+                elif op == BridgeOp.Publish:
+                    self.published.append((channel, data))
+                self.changed.notify_all()
+            if op == BridgeOp.Publish:
+                self.publish(channel, data)
+        with self.changed:
+            for readers in self.readers.values():
+                readers.discard(conn)
+            self.changed.notify_all()
+
+    def wait_for_readers(self, channels: List[str], timeout: float = None) -> bool:
+        """
+        Waits until every channel has a subscriber
+
+        :param List[str] channels: names of the channels
+        :param float timeout: seconds to wait at most, forever if None
+
+        :returns: whether every channel has a subscriber
+        :rtype: bool
+        """
+        with self.changed:
+            return self.changed.wait_for(
+                lambda: all(self.readers[c] for c in channels), timeout
+            )
+
+    def publish(self, channel: str, data: bytes) -> int:
+        """
+        Sends a message to the subscribers of a channel
+
+        :param str channel: name of the channel
+        :param bytes data: serialized message
+
+        :returns: number of subscribers the message was sent to
+        :rtype: int
+        """
+        topic = channel.encode('ascii')
+        frame = BridgeOp.Publish + to_32_le(len(topic)) + topic
+        frame += to_32_le(len(data)) + data
+        with self.changed:
+            readers = list(self.readers[channel])
+        for conn in readers:
+            try:
+                conn.sendall(frame)
+            except OSError:
+                pass
+        return len(readers)
+
+    def replay(
+        self,
+        record_file: str,
+        rate: Optional[float] = 1.0,
+        stop: Optional[Event] = None,
+    ) -> int:
+        """
+        Publishes the messages of a record in order
+
+        :param str record_file: the record to replay
+        :param float rate: replay speed relative to the recorded timing, or
+            None to publish messages as fast as possible
+        :param Event stop: stops the replay once set
+
+        :returns: number of messages published
+        :rtype: int
+        """
+        count = 0
+        start, first = time.monotonic(), None
+        for topic, msg, t in Record(record_file).read_messages():
+            if stop is not None and stop.is_set():
+                break
+            if rate is not None:
+                first = t if first is None else first
+                delay = start + (t - first) * 1e-9 / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.publish(topic, msg.SerializeToString())
+            count += 1
+        return count
@@ -1,3 +1,4 @@
+import select
 import socket
 from collections import defaultdict
 from dataclasses import dataclass
@@ -238,14 +239,50 @@ class CyberBridge:
         msg += self.__prepare_bytes(data)
         self.conn.send(msg)
 
+    def read_frames(self, buffer: bytearray):
+        """
+        Passes every complete message of the received data to on_read and
+        removes it from the buffer, since a single read may hold several
+        messages or only part of one
+
+        :param bytearray buffer: data received from bridge and not read yet
+        """
+        while len(buffer) >= 5:
+            if buffer[0] != int.from_bytes(BridgeOp.Publish, 'big'):
+                # the length of other operations is unknown
+                buffer.clear()
+                return
+            header_length = 9 + self.__get_32_le(bytes(buffer[1:5]))
+            if len(buffer) < header_length:
+                return
+            message_size = self.__get_32_le(
+                bytes(buffer[header_length - 4 : header_length])
+            )
+            if len(buffer) < header_length + message_size:
+                return
+            data = bytes(buffer[: header_length + message_size])
+            del buffer[: header_length + message_size]
+            self.on_read(data)
+
     def _spin(self):
         """
         Helper function to start receiving data from socket
         """
+        buffer = bytearray()
         while self.spinning:
+            # waiting for data rather than polling leaves the CPU to the
+            # subscribers, while still noticing stop() in time
+            readable, _, _ = select.select([self.conn], [], [], 0.1)
+            if not readable:
+                continue
             try:
                 data = self.conn.recv(65527)
-                self.on_read(data)
+                if not data:
+                    # connection closed by the bridge
+                    self.spinning = False
+                    return
+                buffer.extend(data)
+                self.read_frames(buffer)
             except Exception:
                 pass
 
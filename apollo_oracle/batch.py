@@ -0,0 +1,340 @@
+import multiprocessing
+import queue
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from cyber_record.record import Record
+
+from apollo_oracle.cache import ResultCache
+from apollo_oracle.core import (
+    OracleExtension,
+    Violation,
+    analyze_record,
+    find_routing_request_time,
+)
+from apollo_oracle.profiler import OracleProfiler
+from apollo_oracle.sink import QueueSink, write_json_line
+from apollo_oracle.utils.map_service import MapService, load_map_service
+from apollo_oracle.utils.vehicle_param import VehicleParam
+
+
+class OracleWorker:
+    """
+    Analyzes records one after another with a map and vehicle params that
+    are loaded once. Every record gets fresh oracle instances, except for
+    oracles whose results are found in the cache.
+    """
+
+    def __init__(
+        self,
+        map_service: MapService,
+        vehicle_param: VehicleParam,
+        oracles: List[Type[OracleExtension]],
+        args_dict: Dict,
+        cache: Optional[ResultCache] = None,
+        profile: bool = False,
+        lines: Optional[queue.Queue] = None,
+    ):
+        self.map_service = map_service
+        self.vehicle_param = vehicle_param
+        self.oracles = oracles
+        self.args_dict = args_dict
+        self.cache = cache
+        self.profile = profile
+        # queue of output lines, if violations are streamed
+        self.lines = lines
+
+    @staticmethod
+    def load(
+        map_file: Path,
+        vehicle_param_file: Path,
+        oracles: List[Type[OracleExtension]],
+        args_dict: Dict,
+        cache_dir: Optional[Path] = None,
+        profile: bool = False,
+        lines: Optional[queue.Queue] = None,
+    ) -> 'OracleWorker':
+        return OracleWorker(
+            load_map_service(map_file),
+            VehicleParam.load_from_file(vehicle_param_file),
+            oracles,
+            args_dict,
+            None
+            if cache_dir is None
+            else ResultCache(cache_dir, map_file, vehicle_param_file),
+            profile,
+            lines,
+        )
+
+    def create_oracles(
+        self, oracles: Optional[List[Type[OracleExtension]]] = None
+    ) -> List[OracleExtension]:
+        return [
+            e(self.map_service, self.vehicle_param, self.args_dict)
+            for e in (self.oracles if oracles is None else oracles)
+        ]
+
+    def analyze(self, record_file: Path) -> Dict[str, Any]:
+        result = self._analyze(record_file)
+        if self.lines is not None:
+            # violations were streamed; the record is closed by the result
+            self.lines.put(result)
+        return result
+
+    def _analyze(self, record_file: Path) -> Dict[str, Any]:
+        profiler = OracleProfiler() if self.profile else None
+        sink = None if self.lines is None else QueueSink(self.lines, str(record_file))
+        analyze = partial(
+            self.analyze_oracles, record_file, profiler=profiler, sink=sink
+        )
+        try:
+            if self.cache is None:
+                violations = analyze(self.oracles)
+            else:
+                violations = self.cache.analyze(
+                    record_file, self.oracles, self.args_dict, analyze, sink
+                )
+        except Exception:
+            return {'record': str(record_file), 'error': traceback.format_exc()}
+        result = {'record': str(record_file)}
+        if sink is None:
+            result['violations'] = [v.asdict() for v in violations]
+        else:
+            result['done'] = True
+        if profiler is not None:
+            result['profile'] = profiler.report()
+        return result
+
+    def analyze_oracles(
+        self,
+        record_file: Path,
+        oracles: List[Type[OracleExtension]],
+        profiler: Optional[OracleProfiler] = None,
+        sink: Optional[QueueSink] = None,
+    ) -> List[Violation]:
+        return analyze_record(
+            self.create_oracles(oracles), record_file, profiler=profiler, sink=sink
+        )
+
+    def analyze_shard(
+        self,
+        record_file: Path,
+        oracles: List[Type[OracleExtension]],
+        start_time: int,
+        end_time: int,
+    ) -> List[Any]:
+        oracle_instances = self.create_oracles(oracles)
+        analyze_record(oracle_instances, record_file, start_time, end_time)
+        return [o.snapshot() for o in oracle_instances]
+
+    def merge_shards(
+        self, oracles: List[Type[OracleExtension]], snapshots: List[List[Any]]
+    ) -> List[Violation]:
+        # snapshots of every shard, in time order, are merged into the first
+        oracle_instances = self.create_oracles(oracles)
+        violations = []
+        for i, oracle_instance in enumerate(oracle_instances):
+            for shard_snapshots in snapshots:
+                oracle_instance.merge(shard_snapshots[i])
+            violations.extend(oracle_instance.get_violations())
+        return violations
+
+
+# worker of the current pool process, created by the pool initializer
+_worker: Optional[OracleWorker] = None
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = OracleWorker.load(*args)
+
+
+def _analyze(record_file: Path) -> Dict[str, Any]:
+    return _worker.analyze(record_file)
+
+
+def _call_worker(method: str, *args):
+    return getattr(_worker, method)(*args)
+
+
+def _write_lines(fp, lines: queue.Queue):
+    for line in iter(lines.get, None):
+        write_json_line(fp, line)
+
+
+def find_records(scenarios: Path) -> List[Path]:
+    """
+    List the records of a batch, given either a directory whose files are
+    records or a manifest with one record path per line. Blank lines and
+    lines starting with ``#`` in a manifest are ignored.
+    """
+    if scenarios.is_dir():
+        return sorted(p for p in scenarios.iterdir() if p.is_file())
+    lines = (line.strip() for line in scenarios.read_text().splitlines())
+    return [Path(line) for line in lines if line and not line.startswith('#')]
+
+
+def analyze_records(
+    record_files: List[Path],
+    map_file: Path,
+    vehicle_param_file: Path,
+    oracles: List[Type[OracleExtension]],
+    args_dict: Dict,
+    workers: int = 1,
+    cache_dir: Optional[Path] = None,
+    profile: bool = False,
+    lines: Optional[queue.Queue] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze records in a pool of worker processes, each loading the map and
+    vehicle params once. Results are yielded as records finish, with either
+    the violations or the error of each record. With a cache directory,
+    only oracles without cached results are run. With ``profile``, results
+    also contain the profile of the analysis. With a queue of ``lines``,
+    violations are put into it as they are found, followed by the result of
+    their record, and results do not contain the violations.
+    """
+    init_args = (
+        map_file,
+        vehicle_param_file,
+        list(oracles),
+        args_dict,
+        cache_dir,
+        profile,
+        lines,
+    )
+    if workers <= 1:
+        worker = OracleWorker.load(*init_args)
+        yield from map(worker.analyze, record_files)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=init_args
+    ) as executor:
+        # no reference to the futures is kept, so that results are released
+        # once they are yielded
+        futures = as_completed(executor.submit(_analyze, r) for r in record_files)
+        for future in futures:
+            yield future.result()
+
+
+def run_batch(
+    record_files: List[Path],
+    out_file: Path,
+    map_file: Path,
+    vehicle_param_file: Path,
+    oracles: List[Type[OracleExtension]],
+    args_dict: Dict,
+    workers: int = 1,
+    cache_dir: Optional[Path] = None,
+    profile: bool = False,
+    stream: bool = False,
+):
+    """
+    Analyze records and write one JSON line per record to ``out_file`` as
+    soon as it is analyzed. With ``stream``, every violation is written as a
+    line as soon as it is found instead, and each record is closed by a line
+    with either ``"done": true`` or its error.
+    """
+    failed = 0
+    with open(out_file, 'w') as fp:
+        lines, writer = None, None
+        if stream:
+            # lines of every worker are written by a single thread
+            lines = multiprocessing.Queue() if workers > 1 else queue.Queue()
+            writer = threading.Thread(target=_write_lines, args=(fp, lines))
+            writer.start()
+
+        results = analyze_records(
+            record_files,
+            map_file,
+            vehicle_param_file,
+            oracles,
+            args_dict,
+            workers,
+            cache_dir,
+            profile,
+            lines,
+        )
+        for i, result in enumerate(results, start=1):
+            if not stream:
+                write_json_line(fp, result)
+            if 'error' in result:
+                failed += 1
+                print(f'[{i}/{len(record_files)}] {result["record"]}: failed')
+            elif not stream:
+                triggered = [v['name'] for v in result['violations'] if v['triggered']]
+                print(f'[{i}/{len(record_files)}] {result["record"]}: {triggered}')
+            else:
+                print(f'[{i}/{len(record_files)}] {result["record"]}: done')
+
+        if writer is not None:
+            # workers have exited, so all their lines are queued before this
+            lines.put(None)
+            writer.join()
+    print(f'Analyzed {len(record_files)} records ({failed} failed)')
+
+
+def analyze_record_sharded(
+    record_file: Path,
+    map_file: Path,
+    vehicle_param_file: Path,
+    oracles: List[Type[OracleExtension]],
+    args_dict: Dict,
+    workers: int = 1,
+    shards: int = 1,
+) -> List[Violation]:
+    """
+    Analyze a single record split into shards of equal duration, which are
+    analyzed in a pool of worker processes and merged in time order. Every
+    shard but the first also reads the ``SHARD_OVERLAP`` seconds before it
+    to rebuild the state of the oracles. Oracles that cannot be merged
+    analyze the whole record in one worker, in parallel with the shards.
+    """
+    oracles = list(oracles)
+    mergeable = [o for o in oracles if o.is_mergeable()]
+    sequential = [o for o in oracles if not o.is_mergeable()]
+    start = find_routing_request_time(record_file)
+    init_args = (map_file, vehicle_param_file, oracles, args_dict)
+
+    if shards <= 1 or len(mergeable) == 0 or start is None:
+        worker = OracleWorker.load(*init_args)
+        return worker.analyze_oracles(record_file, oracles)
+
+    end = Record(record_file).get_end_time() + 1
+    bounds = [start + (end - start) * i // shards for i in range(shards + 1)]
+    overlap = int(max(o.SHARD_OVERLAP for o in mergeable) * 1e9)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=init_args
+    ) as executor:
+        if len(sequential) > 0:
+            sequential_future = executor.submit(
+                _call_worker, 'analyze_oracles', record_file, sequential
+            )
+        shard_futures = [
+            executor.submit(
+                _call_worker,
+                'analyze_shard',
+                record_file,
+                mergeable,
+                max(start, lo - overlap),
+                hi - 1,
+            )
+            for lo, hi in zip(bounds, bounds[1:])
+        ]
+        snapshots = [f.result() for f in shard_futures]
+        merged = executor.submit(
+            _call_worker, 'merge_shards', mergeable, snapshots
+        ).result()
+        violations = sequential_future.result() if len(sequential) > 0 else []
+
+    # violations are reported in the order of the oracles
+    by_name = {o.get_name(): [] for o in oracles}
+    for v in [*merged, *violations]:
+        by_name.setdefault(v.name, []).append(v)
+    return [v for vs in by_name.values() for v in vs]
@@ -0,0 +1,136 @@
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from apollo_oracle.core import OracleExtension, Violation, ViolationSink
+
+# bumped whenever the layout of cache entries changes
+CACHE_FORMAT = 1
+
+
+def file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _memoized_digest(path: str, size: int, mtime_ns: int) -> str:
+    return file_digest(Path(path))
+
+
+def memoized_file_digest(path: Path) -> str:
+    # hashed once per process as long as the file is unchanged, e.g. for
+    # every record of a batch sharing the same file
+    stat = path.stat()
+    return _memoized_digest(str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    # written to a temporary file and renamed, so that concurrent workers
+    # never read a partial entry
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+class ResultCache:
+    """
+    Violations of every oracle on every analyzed record, stored as one JSON
+    file per oracle and record under a cache directory. An entry is keyed by
+    the content of the record, HD map and vehicle param files and by the
+    configuration of the oracle, so that changing any of them re-runs the
+    oracle.
+    """
+
+    def __init__(self, cache_dir: Path, map_file: Path, vehicle_param_file: Path):
+        self.cache_dir = Path(cache_dir)
+        self.map_digest = self.digest(Path(map_file))
+        self.vehicle_param_digest = self.digest(Path(vehicle_param_file))
+
+    def digest(self, path: Path) -> str:
+        # digests are memoized by path, size and modification time, so that
+        # unchanged records are not hashed again
+        stat = path.stat()
+        path_key = hashlib.sha256(str(path.resolve()).encode()).hexdigest()
+        entry = self.cache_dir / 'digests' / f'{path_key}.json'
+        try:
+            data = json.loads(entry.read_text())
+            if data['size'] == stat.st_size and data['mtime_ns'] == stat.st_mtime_ns:
+                return data['digest']
+        except (OSError, ValueError, KeyError):
+            pass
+        digest = file_digest(path)
+        _write_json(
+            entry,
+            {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest},
+        )
+        return digest
+
+    def key(
+        self, oracle: Type[OracleExtension], record_digest: str, args_dict: Dict
+    ) -> str:
+        data = {
+            'format': CACHE_FORMAT,
+            'record': record_digest,
+            'map': self.map_digest,
+            'vehicle_param': self.vehicle_param_digest,
+            'oracle': oracle.get_name(),
+            'config': oracle.get_config(args_dict),
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[List[Violation]]:
+        try:
+            data = json.loads((self.cache_dir / 'results' / f'{key}.json').read_text())
+        except (OSError, ValueError):
+            return None
+        return [Violation.from_dict(v) for v in data]
+
+    def store(self, key: str, violations: List[Violation]) -> None:
+        _write_json(
+            self.cache_dir / 'results' / f'{key}.json',
+            [v.asdict() for v in violations],
+        )
+
+    def analyze(
+        self,
+        record_file: Path,
+        oracles: List[Type[OracleExtension]],
+        args_dict: Dict,
+        analyze: Callable[[List[Type[OracleExtension]]], List[Violation]],
+        sink: Optional[ViolationSink] = None,
+    ) -> List[Violation]:
+        """
+        Analyze a record with the oracles whose results are not cached, and
+        merge their violations with the cached ones in the order of the
+        oracles. ``analyze`` is only given the missing oracles, so the record
+        is only read for their topics. Cached violations are pushed to the
+        sink before the analysis starts.
+        """
+        record_digest = self.digest(Path(record_file))
+        keys = {o: self.key(o, record_digest, args_dict) for o in oracles}
+        results = {o: self.load(keys[o]) for o in oracles}
+        missing = [o for o in oracles if results[o] is None]
+
+        if sink is not None:
+            for o in oracles:
+                for v in results[o] or []:
+                    sink.emit(v)
+
+        if len(missing) > 0:
+            # violations are attributed to oracles by name
+            by_name = {o.get_name(): [] for o in missing}
+            for v in analyze(missing):
+                by_name.setdefault(v.name, []).append(v)
+            for o in missing:
+                results[o] = by_name[o.get_name()]
+                self.store(keys[o], results[o])
+
+        return [v for o in oracles for v in results[o]]
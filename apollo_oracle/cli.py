@@ -5,7 +5,16 @@ from typing import List
 
 from rich_argparse import RichHelpFormatter
 
-from apollo_oracle.core import OracleExtension, OracleExtensionManager, analyze_record
+from apollo_oracle.batch import analyze_record_sharded, find_records, run_batch
+from apollo_oracle.cache import ResultCache
+from apollo_oracle.core import (
+    OracleExtension,
+    OracleExtensionManager,
+    Violation,
+    analyze_record,
+)
+from apollo_oracle.profiler import OracleProfiler, print_profile
+from apollo_oracle.sink import JsonLinesSink, write_json_line
 from apollo_oracle.utils.map_service import load_map_service
 from apollo_oracle.utils.vehicle_param import VehicleParam
 
@@ -54,7 +63,52 @@ def set_up_parser():
         help='Specify path of the HD map',
     )
 
-    parser.add_argument('scenario', help='Scenario to analyze')
+    parser.add_argument(
+        '-b',
+        '--batch',
+        default=False,
+        action='store_true',
+        help='Analyze every record of a directory or manifest into a JSON lines report',
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of worker processes analyzing records or shards',
+    )
+    parser.add_argument(
+        '-s',
+        '--shards',
+        type=int,
+        default=1,
+        help='Number of time shards a single record is split into and analyzed in',
+    )
+    parser.add_argument(
+        '-c',
+        '--cache-dir',
+        type=str,
+        default=None,
+        help='Directory caching the results of every oracle, to skip unchanged oracles',
+    )
+    parser.add_argument(
+        '-p',
+        '--profile',
+        default=False,
+        action='store_true',
+        help='Add the time spent by every oracle and the record reader to the report',
+    )
+    parser.add_argument(
+        '--stream',
+        default=False,
+        action='store_true',
+        help='Write violations as JSON lines as soon as they are found',
+    )
+
+    parser.add_argument(
+        'scenario',
+        help='Scenario to analyze (in batch mode, a directory or manifest of records)',
+    )
     parser.add_argument('out', help='Location to save analysis report')
 
     return parser
@@ -106,20 +160,101 @@ def main():
     if out_file.exists():
         parser.error('Output file already exists!')
 
-    # load dependencies and run tests
-    map_service = load_map_service(map_file)
-    vehicle_param = VehicleParam.load_from_file(vehicle_param_file)
+    if args.workers < 1:
+        parser.error('Number of workers must be positive')
+
+    if args.shards < 1:
+        parser.error('Number of shards must be positive')
+
+    if args.batch and args.shards > 1:
+        parser.error('Command line option --batch and --shards are mutually exclusive')
+
+    if args.profile and args.shards > 1:
+        parser.error(
+            'Command line option --profile and --shards are mutually exclusive'
+        )
 
     active_oracles = oracle_manager.get_active_extensions(
         all_oracle_active, included_oracles, excluded_oracles
     )
-    oracle_instances: List[OracleExtension] = [
-        e(map_service, vehicle_param, args_dict) for e in active_oracles
-    ]
+    cache_dir = None if args.cache_dir is None else Path(args.cache_dir)
+
+    if args.batch:
+        record_files = find_records(record_file)
+        print('Active extensions %s' % [e.get_name() for e in active_oracles])
+        print(f'Writing results of {len(record_files)} records to {out_file}')
+        run_batch(
+            record_files,
+            out_file,
+            map_file,
+            vehicle_param_file,
+            active_oracles,
+            args_dict,
+            args.workers,
+            cache_dir,
+            args.profile,
+            args.stream,
+        )
+        return
 
     print('Active extensions %s' % [e.get_name() for e in active_oracles])
-    violations = analyze_record(oracle_instances, record_file)
+    profiler = OracleProfiler() if args.profile else None
+    # with --stream, the report is written while analyzing
+    stream = open(out_file, 'w') if args.stream else None
+    sink = None if stream is None else JsonLinesSink(stream)
+
+    def analyze(oracles) -> List[Violation]:
+        if args.shards > 1:
+            violations = analyze_record_sharded(
+                record_file,
+                map_file,
+                vehicle_param_file,
+                oracles,
+                args_dict,
+                args.workers,
+                args.shards,
+            )
+            # shards are only merged at the end, so is their output
+            if sink is not None:
+                for v in violations:
+                    sink.emit(v)
+            return violations
+        # load dependencies and run tests
+        map_service = load_map_service(map_file)
+        vehicle_param = VehicleParam.load_from_file(vehicle_param_file)
+
+        oracle_instances: List[OracleExtension] = [
+            e(map_service, vehicle_param, args_dict) for e in oracles
+        ]
+        return analyze_record(
+            oracle_instances, record_file, profiler=profiler, sink=sink
+        )
+
+    if cache_dir is None:
+        violations = analyze(active_oracles)
+    else:
+        cache = ResultCache(cache_dir, map_file, vehicle_param_file)
+        violations = cache.analyze(
+            record_file, active_oracles, args_dict, analyze, sink
+        )
     print(violations)
+    profile = None
+    if profiler is not None:
+        profile = profiler.report()
+        print_profile(profile)
+
+    if stream is not None:
+        # the profile follows the violations as the last line
+        if profile is not None:
+            write_json_line(stream, {'profile': profile})
+        stream.close()
+        print(f'Results written to {out_file}')
+        return
+
+    report = [v.asdict() for v in violations]
+    if profile is not None:
+        # the violations are nested next to the profile
+        report = {'violations': report, 'profile': profile}
     print(f'Writing results to {out_file}')
     with open(out_file, 'w') as fp:
-        json.dump([v.asdict() for v in violations], fp)
+        json.dump(report, fp)
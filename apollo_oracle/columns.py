@@ -0,0 +1,59 @@
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+ColumnExtractor = Callable[[List[Any], List[int]], Dict[str, np.ndarray]]
+
+LOCALIZATION_TOPIC = '/apollo/localization/pose'
+
+# columns of localization batches, besides the record time ``t`` (ns)
+LOCALIZATION_COLUMNS = (
+    'x',
+    'y',
+    'z',
+    'heading',
+    'vx',
+    'vy',
+    'vz',
+    'ax',
+    'ay',
+    'az',
+)
+
+
+def localization_columns(
+    messages: List[Any], times: List[int]
+) -> Dict[str, np.ndarray]:
+    # fields are read in a single pass over the messages, shared by every
+    # oracle receiving the batch
+    rows = []
+    for msg in messages:
+        pose = msg.pose
+        position = pose.position
+        velocity = pose.linear_velocity
+        acceleration = pose.linear_acceleration
+        rows.append(
+            (
+                position.x,
+                position.y,
+                position.z,
+                pose.heading,
+                velocity.x,
+                velocity.y,
+                velocity.z,
+                acceleration.x,
+                acceleration.y,
+                acceleration.z,
+            )
+        )
+    values = np.array(rows, dtype=np.float64).reshape(-1, len(LOCALIZATION_COLUMNS))
+    columns = dict(zip(LOCALIZATION_COLUMNS, np.ascontiguousarray(values.T)))
+    columns['t'] = np.array(times, dtype=np.int64)
+    return columns
+
+
+# topics delivered to OracleExtension.on_batch, with the function extracting
+# the columns of a batch of their messages
+COLUMN_EXTRACTORS: Dict[str, ColumnExtractor] = {
+    LOCALIZATION_TOPIC: localization_columns,
+}
@@ -1,10 +1,13 @@
 import sys
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Dict, List, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, OrderedDict, Set, Tuple
 
+import numpy as np
 from cyber_record.record import Record
 
+from apollo_oracle.columns import COLUMN_EXTRACTORS
+from apollo_oracle.profiler import OracleProfiler
 from apollo_oracle.utils.map_service import MapService
 from apollo_oracle.utils.vehicle_param import VehicleParam
 
@@ -35,23 +38,102 @@ class Violation:
         return Violation(data['name'], data['triggered'], data['features'])
 
 
+class ViolationSink(object):
+    # receives the violations of an analysis as soon as they are found
+    def emit(self, violation: Violation) -> None:
+        pass
+
+
 class OracleExtension(object):
+    # seconds of messages before a shard that a mergeable oracle needs to
+    # rebuild its state, e.g. the obstacles last perceived
+    SHARD_OVERLAP = 0.0
+    # bumped whenever the verdict of an oracle changes for the same record,
+    # which invalidates its cached results
+    VERSION = 1
+
     def __init__(
         self, map_service: MapService, vehicle_param: VehicleParam, args_dict: Dict
     ):
         self.map_service = map_service
         self.vehicle_param = vehicle_param
         self.args_dict = args_dict
+        self.dispatcher: Optional['OracleDispatcher'] = None
+        # set once the verdict of the oracle is final
+        self.done = False
+        self.sink: Optional[ViolationSink] = None
+        # violations already pushed to the sink
+        self.emitted: List[Violation] = list()
 
     def get_interested_topics(self) -> List[str]:
+        # read once, when the oracle is added to a dispatcher
         return []
 
+    def subscribe(self, topic: str) -> None:
+        # start receiving messages of a topic in addition to the interested ones
+        if self.dispatcher is not None:
+            self.dispatcher.subscribe_oracle(self, topic)
+
+    def unsubscribe(self, topic: str) -> None:
+        if self.dispatcher is not None:
+            self.dispatcher.unsubscribe_oracle(self, topic)
+
+    def emit(self, violation: Violation) -> None:
+        # push a violation to the sink as soon as it occurs; it must still be
+        # returned by get_violations(), which does not emit it again
+        self.emitted.append(violation)
+        if self.sink is not None:
+            self.sink.emit(violation)
+
+    def finish(self) -> None:
+        # stop receiving messages; analysis ends once every oracle is done
+        self.done = True
+        if self.dispatcher is not None:
+            self.dispatcher.remove(self)
+
     def on_message(self, topic: str, msg: Any, t: float) -> None:
         pass
 
+    def on_batch(self, topic: str, columns: Dict[str, np.ndarray]) -> None:
+        # optional replacement of on_message for the topics of
+        # COLUMN_EXTRACTORS, receiving consecutive messages as column arrays
+        # of equal length, e.g. ``t``, ``x`` and ``vx`` of localization poses
+        raise NotImplementedError
+
+    @classmethod
+    def handles_batches(cls) -> bool:
+        return cls.on_batch is not OracleExtension.on_batch
+
     def get_violations(self) -> List[Violation]:
         return []
 
+    def snapshot(self) -> Any:
+        # picklable state of the oracle, for analyzing a record in shards
+        raise NotImplementedError
+
+    def merge(self, snapshot: Any) -> None:
+        # combine the state of the oracle with the snapshot of an oracle that
+        # analyzed the following shard of the record
+        raise NotImplementedError
+
+    @classmethod
+    def is_mergeable(cls) -> bool:
+        return (
+            cls.snapshot is not OracleExtension.snapshot
+            and cls.merge is not OracleExtension.merge
+        )
+
+    @classmethod
+    def get_config(cls, args_dict: Dict) -> Dict[str, Any]:
+        # everything besides the record, map and vehicle params the verdict
+        # depends on; by default the upper case class constants, such as the
+        # version and thresholds
+        return {
+            k: getattr(cls, k)
+            for k in dir(cls)
+            if k.isupper() and isinstance(getattr(cls, k), (bool, int, float, str))
+        }
+
     @staticmethod
     def get_name() -> str:
         raise NotImplementedError
@@ -62,9 +144,128 @@ class OracleExtension(object):
 
 
 class OracleInterrupt(Exception):
+    # stops the analysis for every oracle; oracles that reached their
+    # verdict should call OracleExtension.finish() instead
     pass
 
 
+# analysis starts at the first routing request of a record
+ROUTING_REQUEST_TOPIC = '/apollo/routing_request'
+
+
+MessageHandler = Callable[[str, Any, float], None]
+BatchHandler = Callable[[str, Dict[str, np.ndarray]], None]
+
+
+class OracleDispatcher:
+    """
+    Routes record messages to the oracles subscribed to their topic through
+    a topic -> handlers table, built once from the interested topics of the
+    oracles and changed only by explicit (un)subscriptions. Messages of the
+    topics of COLUMN_EXTRACTORS are buffered and delivered as columns to the
+    oracles implementing on_batch().
+    """
+
+    # largest number of messages delivered in one batch
+    BATCH_SIZE = 1000
+
+    def __init__(self, oracle_instances: List[OracleExtension]):
+        self.handlers: Dict[str, Tuple[MessageHandler, ...]] = dict()
+        self.batch_handlers: Dict[str, Tuple[BatchHandler, ...]] = dict()
+        # buffered messages and times of every batched topic
+        self.pending: Dict[str, Tuple[List[Any], List[int]]] = dict()
+        # topics whose messages are handled by an oracle that also receives
+        # batches, which are delivered first to keep messages in time order
+        self.flush_topics: Set[str] = set()
+        self.subscriptions_changed = False
+        # oracles that are not done yet
+        self.active: List[OracleExtension] = list()
+        for oracle_instance in oracle_instances:
+            oracle_instance.dispatcher = self
+            if oracle_instance.done:
+                continue
+            self.active.append(oracle_instance)
+            for topic in oracle_instance.get_interested_topics():
+                self.subscribe_oracle(oracle_instance, topic)
+
+    @property
+    def topics(self) -> List[str]:
+        return list({**self.handlers, **self.batch_handlers})
+
+    @property
+    def done(self) -> bool:
+        return len(self.active) == 0
+
+    def remove(self, oracle_instance: OracleExtension) -> None:
+        for topic in self.topics:
+            self.unsubscribe_oracle(oracle_instance, topic)
+        if oracle_instance in self.active:
+            self.active.remove(oracle_instance)
+
+    def subscribe_oracle(self, oracle_instance: OracleExtension, topic: str) -> None:
+        if topic in COLUMN_EXTRACTORS and oracle_instance.handles_batches():
+            self.subscribe(topic, oracle_instance.on_batch, batch=True)
+        else:
+            self.subscribe(topic, oracle_instance.on_message)
+
+    def unsubscribe_oracle(self, oracle_instance: OracleExtension, topic: str) -> None:
+        self.unsubscribe(topic, oracle_instance.on_message)
+        self.unsubscribe(topic, oracle_instance.on_batch, batch=True)
+
+    def subscribe(self, topic: str, handler: Callable, batch: bool = False) -> None:
+        table = self.batch_handlers if batch else self.handlers
+        handlers = table.get(topic, ())
+        if handler not in handlers:
+            # handlers are replaced rather than modified, so that dispatching
+            # is not affected by (un)subscriptions of the handlers it calls
+            table[topic] = handlers + (handler,)
+            self.subscriptions_changed = True
+            self._update_flush_topics()
+
+    def unsubscribe(self, topic: str, handler: Callable, batch: bool = False) -> None:
+        table = self.batch_handlers if batch else self.handlers
+        handlers = tuple(h for h in table.get(topic, ()) if h != handler)
+        if handlers:
+            table[topic] = handlers
+        else:
+            table.pop(topic, None)
+        self.subscriptions_changed = True
+        self._update_flush_topics()
+
+    def _update_flush_topics(self) -> None:
+        batching = {
+            getattr(h, '__self__', h) for hs in self.batch_handlers.values() for h in hs
+        }
+        self.flush_topics = {
+            topic
+            for topic, handlers in self.handlers.items()
+            if any(getattr(h, '__self__', h) in batching for h in handlers)
+        }
+
+    def dispatch(self, topic: str, msg: Any, t: float) -> None:
+        if topic in self.batch_handlers:
+            messages, times = self.pending.setdefault(topic, ([], []))
+            messages.append(msg)
+            times.append(t)
+            if len(messages) >= self.BATCH_SIZE:
+                self.flush(topic)
+        if topic in self.flush_topics:
+            self.flush()
+        for handler in self.handlers.get(topic, ()):
+            handler(topic, msg, t)
+
+    def flush(self, topic: Optional[str] = None) -> None:
+        # deliver the buffered messages of a topic, or of every topic
+        for topic in list(self.pending) if topic is None else [topic]:
+            messages, times = self.pending.pop(topic, ([], []))
+            handlers = self.batch_handlers.get(topic, ())
+            if len(messages) == 0 or len(handlers) == 0:
+                continue
+            columns = COLUMN_EXTRACTORS[topic](messages, times)
+            for handler in handlers:
+                handler(topic, columns)
+
+
 class OracleExtensionManager:
     def __init__(self):
         self.available_extensions = list_plugins()
@@ -117,25 +318,93 @@ def list_plugins(extension_point='apollo_oracle.extensions'):
     )
 
 
+def find_routing_request_time(record_file: Path) -> Optional[int]:
+    for _, _, t in Record(record_file).read_messages(topics=[ROUTING_REQUEST_TOPIC]):
+        return t
+    return None
+
+
+def collect_violations(
+    oracle_instances: List[OracleExtension], sink: Optional[ViolationSink] = None
+) -> List[Violation]:
+    # violations of every oracle, pushing those not emitted yet to the sink
+    violations: List[Violation] = list()
+    for oracle_instance in oracle_instances:
+        oracle_violations = oracle_instance.get_violations()
+        if sink is not None:
+            emitted = {id(v) for v in oracle_instance.emitted}
+            for v in oracle_violations:
+                if id(v) not in emitted:
+                    sink.emit(v)
+        violations.extend(oracle_violations)
+    return violations
+
+
 def analyze_record(
     oracle_instances: List[OracleExtension],
     record_file: Path,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    profiler: Optional[OracleProfiler] = None,
+    sink: Optional[ViolationSink] = None,
 ):
+    # a given start time (in nanoseconds) replaces the first routing request
+    # as the start of the analysis; every violation is pushed to the sink
+    # once, as soon as it is emitted or else at the end of the analysis
     record_file = Record(record_file)
-    found_routing_request = False
+    for oracle_instance in oracle_instances:
+        oracle_instance.sink = sink
+        if profiler is not None:
+            profiler.attach(oracle_instance)
+    dispatcher = OracleDispatcher(oracle_instances)
+    found_routing_request = start_time is not None
+    # messages at start_time already read before the topics changed, by topic
+    skip: Dict[str, int] = dict()
     try:
-        for topic, msg, t in record_file.read_messages():
-            if topic == '/apollo/routing_request':
-                found_routing_request = True
-            if not found_routing_request:
-                continue
-            for oracle_instance in oracle_instances:
-                if topic in oracle_instance.get_interested_topics():
-                    oracle_instance.on_message(topic, msg, t)
+        while not dispatcher.done:
+            # only messages some oracle is subscribed to are decoded
+            topics = {ROUTING_REQUEST_TOPIC, *dispatcher.topics}
+            dispatcher.subscriptions_changed = False
+            messages = record_file.read_messages(
+                topics=sorted(topics), start_time=start_time, end_time=end_time
+            )
+            if profiler is not None:
+                messages = profiler.read(messages)
+            # messages read so far at time seen_t, by topic
+            seen_t, seen = None, dict()
+            for topic, msg, t in messages:
+                if t != seen_t:
+                    seen_t, seen = t, dict()
+                seen[topic] = seen.get(topic, 0) + 1
+                if t == start_time and seen[topic] <= skip.get(topic, 0):
+                    continue
+                if topic == ROUTING_REQUEST_TOPIC:
+                    found_routing_request = True
+                if not found_routing_request:
+                    continue
+                dispatcher.dispatch(topic, msg, t)
+                if dispatcher.done:
+                    break
+                if dispatcher.subscriptions_changed:
+                    dispatcher.subscriptions_changed = False
+                    if topics != {ROUTING_REQUEST_TOPIC, *dispatcher.topics}:
+                        # continue after this message with the new topics,
+                        # including the other messages recorded at time t
+                        start_time, skip = t, seen
+                        break
+            else:
+                break
     except OracleInterrupt:
         pass
-    violations: List[Violation] = list()
-    for oracle_instance in oracle_instances:
-        violations.extend(oracle_instance.get_violations())
+    try:
+        # messages buffered for batches before an interrupt are still
+        # delivered, as they would have been one by one
+        dispatcher.flush()
+    except OracleInterrupt:
+        pass
+    violations = collect_violations(oracle_instances, sink)
 
+    if profiler is not None:
+        for oracle_instance in oracle_instances:
+            profiler.detach(oracle_instance)
     return violations
@@ -1,4 +1,5 @@
-from typing import Dict
+import math
+from typing import Dict, Optional
 
 import numpy as np
 
@@ -10,6 +11,8 @@ from apollo_oracle.utils.vehicle_param import VehicleParam
 class AccelerationOracle(OracleExtension):
     FAST_ACCELERATION_THRESHOLD = 4.0
     HARD_BRAKING_THRESHOLD = -4.0
+    # the analysis stops at the first acceleration crossing a threshold
+    VERSION = 2
 
     @staticmethod
     def get_name():
@@ -21,6 +24,7 @@ class AccelerationOracle(OracleExtension):
         super().__init__(map_service, vehicle_param, args_dict)
         self.max_acceleration = 0.0
         self.min_acceleration = 0.0
+        self.violation: Optional[Violation] = None
 
     def get_interested_topics(self):
         return [
@@ -32,7 +36,7 @@ class AccelerationOracle(OracleExtension):
         vy = msg.pose.linear_velocity.y
         ax = msg.pose.linear_acceleration.x
         ay = msg.pose.linear_acceleration.y
-        acceleration = float(np.sqrt(np.square(ax) + np.square(ay)))
+        acceleration = math.sqrt(ax * ax + ay * ay)
 
         projection = vx * ax + vy * ay
         if projection < 0:
@@ -40,19 +44,65 @@ class AccelerationOracle(OracleExtension):
 
         self.max_acceleration = max(acceleration, self.max_acceleration)
         self.min_acceleration = min(acceleration, self.min_acceleration)
+        self.check_thresholds()
 
-    def get_violations(self):
-        triggered = (
+    def on_batch(self, topic, columns):
+        ax, ay = columns['ax'], columns['ay']
+        acceleration = np.sqrt(ax * ax + ay * ay)
+
+        projection = columns['vx'] * ax + columns['vy'] * ay
+        acceleration[projection < 0] *= -1
+
+        # rows after the first one crossing a threshold are not analyzed, as
+        # messages after it are not when received one by one
+        crossing = (acceleration > self.FAST_ACCELERATION_THRESHOLD) | (
+            acceleration < self.HARD_BRAKING_THRESHOLD
+        )
+        if crossing.any():
+            acceleration = acceleration[: int(crossing.argmax()) + 1]
+
+        self.max_acceleration = max(float(acceleration.max()), self.max_acceleration)
+        self.min_acceleration = min(float(acceleration.min()), self.min_acceleration)
+        self.check_thresholds()
+
+    def is_triggered(self) -> bool:
+        return (
             self.max_acceleration > self.FAST_ACCELERATION_THRESHOLD
             or self.min_acceleration < self.HARD_BRAKING_THRESHOLD
         )
-        return [
-            Violation(
-                name=self.get_name(),
-                triggered=triggered,
-                features={
-                    'max_acceleration': self.max_acceleration,
-                    'min_acceleration': self.min_acceleration,
-                },
-            )
-        ]
+
+    def check_thresholds(self):
+        # the verdict cannot change once a threshold is crossed
+        if self.is_triggered():
+            self.violation = self.create_violation()
+            self.emit(self.violation)
+            self.finish()
+
+    def create_violation(self) -> Violation:
+        return Violation(
+            name=self.get_name(),
+            triggered=self.is_triggered(),
+            features={
+                'max_acceleration': self.max_acceleration,
+                'min_acceleration': self.min_acceleration,
+            },
+        )
+
+    def snapshot(self):
+        return self.max_acceleration, self.min_acceleration
+
+    def merge(self, snapshot):
+        # nothing after the first crossing is analyzed
+        if self.done:
+            return
+        max_acceleration, min_acceleration = snapshot
+        self.max_acceleration = max(max_acceleration, self.max_acceleration)
+        self.min_acceleration = min(min_acceleration, self.min_acceleration)
+        if self.is_triggered():
+            self.violation = self.create_violation()
+            self.done = True
+
+    def get_violations(self):
+        if self.violation is not None:
+            return [self.violation]
+        return [self.create_violation()]
@@ -4,7 +4,7 @@ from typing import Dict, List, Optional, Set, Tuple
 from shapely import LineString
 from shapely.geometry import Polygon
 
-from apollo_oracle.core import OracleExtension, OracleInterrupt, Violation
+from apollo_oracle.core import OracleExtension, Violation
 from apollo_oracle.utils import (
     generate_adc_front_vertices,
     generate_adc_polygon,
@@ -100,26 +100,27 @@ class CollisionOracle(OracleExtension):
                     else:
                         # other collision
                         collision_type = 'side'
-                    self.violations.append(
-                        Violation(
-                            self.get_name(),
-                            True,
-                            {
-                                'ego_x': ego_x,
-                                'ego_y': ego_y,
-                                'ego_theta': ego_theta,
-                                'ego_speed': ego_speed,
-                                'obs_x': obs.position[0],
-                                'obs_y': obs.position[1],
-                                'obs_type': obs.type,
-                                'obs_theta': obs.theta,
-                                'obs_length': obs.length,
-                                'obs_width': obs.width,
-                                'collision_type': collision_type,
-                            },
-                        )
+                    violation = Violation(
+                        self.get_name(),
+                        True,
+                        {
+                            'ego_x': ego_x,
+                            'ego_y': ego_y,
+                            'ego_theta': ego_theta,
+                            'ego_speed': ego_speed,
+                            'obs_x': obs.position[0],
+                            'obs_y': obs.position[1],
+                            'obs_type': obs.type,
+                            'obs_theta': obs.theta,
+                            'obs_length': obs.length,
+                            'obs_width': obs.width,
+                            'collision_type': collision_type,
+                        },
                     )
-                    raise OracleInterrupt
+                    self.violations.append(violation)
+                    self.emit(violation)
+                    self.finish()
+                    return
                 else:
                     # no collision
                     pass
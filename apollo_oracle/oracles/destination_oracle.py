@@ -51,6 +51,29 @@ class DestinationOracle(OracleExtension):
                 )
             )
 
+    def on_batch(self, topic, columns):
+        # only the last position of the batch matters
+        self.last_position = Polygon(
+            generate_adc_polygon(
+                float(columns['x'][-1]),
+                float(columns['y'][-1]),
+                float(columns['z'][-1]),
+                float(columns['heading'][-1]),
+                self.vehicle_param,
+            )
+        )
+
+    def snapshot(self):
+        return self.destination, self.last_position
+
+    def merge(self, snapshot):
+        destination, last_position = snapshot
+        # the destination comes from the first routing request
+        if self.destination is None:
+            self.destination = destination
+        if last_position is not None:
+            self.last_position = last_position
+
     def get_violations(self):
         if self.destination is None or self.last_position is None:
             return []
@@ -6,6 +6,7 @@ from cyber_record.record import Record
 from scipy import interpolate
 from shapely import LineString, Polygon
 
+from apollo_oracle.cache import memoized_file_digest
 from apollo_oracle.core import OracleExtension, Violation
 from apollo_oracle.utils import (
     generate_adc_polygon,
@@ -34,6 +35,15 @@ class OptimalOracle(OracleExtension):
             help='Specify reference record file for optimal oracle',
         )
 
+    @classmethod
+    def get_config(cls, args_dict: Dict) -> Dict[str, Any]:
+        # the verdict also depends on the content of the reference record
+        refer = args_dict.get('optimal_refer')
+        return dict(
+            super().get_config(args_dict),
+            refer=memoized_file_digest(Path(refer[0])) if refer else None,
+        )
+
     def __init__(
         self, map_service: MapService, vehicle_param: VehicleParam, args_dict: Dict
     ):
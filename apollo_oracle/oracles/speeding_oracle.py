@@ -1,3 +1,4 @@
+import math
 from typing import Dict
 
 import numpy as np
@@ -36,10 +37,33 @@ class SpeedingOracle(OracleExtension):
 
         vx = msg.pose.linear_velocity.x
         vy = msg.pose.linear_velocity.y
-        speed = np.sqrt(np.square(vx) + np.square(vy))
+        speed = math.sqrt(vx * vx + vy * vy)
 
         lanes = self.map_service.get_nearest_lanes_with_heading(Point(x, y), heading)
+        self._check_speed(x, y, speed, lanes)
+
+    def on_batch(self, topic, columns):
+        vx, vy = columns['vx'], columns['vy']
+        speeds = np.sqrt(vx * vx + vy * vy)
+        xs, ys, headings = columns['x'], columns['y'], columns['heading']
+
+        # nearest lanes are only looked up again once the pose changes, e.g.
+        # not while waiting at a stop line
+        moved = np.ones(len(xs), dtype=bool)
+        moved[1:] = (
+            (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1]) | (headings[1:] != headings[:-1])
+        )
+        lanes = []
+        for x, y, heading, speed, m in zip(
+            xs.tolist(), ys.tolist(), headings.tolist(), speeds.tolist(), moved
+        ):
+            if m:
+                lanes = self.map_service.get_nearest_lanes_with_heading(
+                    Point(x, y), heading
+                )
+            self._check_speed(x, y, speed, lanes)
 
+    def _check_speed(self, x, y, speed, lanes):
         lanes = [lane for lane in lanes if lane not in self.violated_lanes]
 
         if len(lanes) == 0:
@@ -49,13 +73,13 @@ class SpeedingOracle(OracleExtension):
 
         if all((speed - limit) > self.SPEEDING_THRESHOLD for limit in limits):
             # violation happened
-            self.violations.append(
-                Violation(
-                    self.get_name(),
-                    triggered=True,
-                    features={'speeding': speed - max(limits), 'ego_x': x, 'ego_y': y},
-                )
+            violation = Violation(
+                self.get_name(),
+                triggered=True,
+                features={'speeding': speed - max(limits), 'ego_x': x, 'ego_y': y},
             )
+            self.violations.append(violation)
+            self.emit(violation)
             for lane in lanes:
                 self.violated_lanes.add(lane)
 
@@ -0,0 +1,37 @@
+import json
+from typing import Any, Dict, TextIO
+
+from apollo_oracle.core import Violation, ViolationSink
+
+
+def write_json_line(fp: TextIO, data: Dict[str, Any]) -> None:
+    # flushed at once, so that lines can be consumed while the file is
+    # written and survive a crash or timeout of the analysis
+    fp.write(json.dumps(data) + '\n')
+    fp.flush()
+
+
+class JsonLinesSink(ViolationSink):
+    """
+    Writes every violation as a JSON line as soon as it is emitted.
+    """
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+
+    def emit(self, violation: Violation) -> None:
+        write_json_line(self.fp, violation.asdict())
+
+
+class QueueSink(ViolationSink):
+    """
+    Forwards the violations of a record to the queue of the process writing
+    the output of a batch, as ``{"record": ..., "violation": ...}`` lines.
+    """
+
+    def __init__(self, queue, record: str):
+        self.queue = queue
+        self.record = record
+
+    def emit(self, violation: Violation) -> None:
+        self.queue.put({'record': self.record, 'violation': violation.asdict()})
@@ -1,12 +1,15 @@
 import os
 import time
 from pathlib import Path
+from typing import List, Optional
 
 from cyber_record.record import Record
 from loguru import logger
 
 from apollo_container.container import ApolloContainer
 from apollo_container.map_service import MapService
+from apollo_oracle.core import OracleExtension, Violation
+from apollo_resim.live import LiveOracleRunner, connect_bridge
 
 
 def load_routing_request(path: str):
@@ -36,8 +39,11 @@ def re_simulate(
     map_bin: str,
     src: str,
     dst: str,
-    remove_container: bool = True
-):
+    remove_container: bool = True,
+    oracles: Optional[List[OracleExtension]] = None,
+) -> List[Violation]:
+    # with oracles, the scenario is evaluated live over the cyber bridge and
+    # stopped at the first triggered violation
     if Path(dst).exists():
         raise FileExistsError(f'Destination file {dst} exists!')
     ms = MapService()
@@ -63,10 +69,26 @@ def re_simulate(
     ctn.stop_sim_control()
     ctn.start_sim_control(x, y, h)
     ctn.start_ads_modules()
+    runner = None
+    if oracles:
+        ctn.start_bridge()
+        runner = LiveOracleRunner(oracles, connect_bridge(ctn.container_ip))
+        runner.start()
+        if runner.unsupported_topics:
+            logger.warning(f'Topics not evaluated live: {runner.unsupported_topics}')
     logger.debug(f'{ctn.ctn_name} running scenario.')
     ctn.start_recorder(f"/home/{os.environ.get('USER')}/apollo_resim/output")
     ctn.start_replay(f"/home/{os.environ.get('USER')}/apollo_resim/input.00000")
-    time.sleep(total_t + 5)
+    violations = []
+    if runner is None:
+        time.sleep(total_t + 5)
+    else:
+        stopped_early = runner.wait(total_t + 5)
+        if stopped_early:
+            logger.debug(f'{ctn.ctn_name} stopping scenario early.')
+        violations = runner.stop(complete=not stopped_early)
+        if runner.error is not None:
+            logger.error(f'Live oracle evaluation failed: {runner.error}')
     logger.debug(f'{ctn.ctn_name} finished scenario.')
     ctn.stop_recorder()
     ctn.stop_replay()
@@ -86,4 +108,5 @@ def re_simulate(
 
     if remove_container:
         ctn.rm_container()
+    return violations
     # clean_apollo_logs(apollo_root)
@@ -5,6 +5,9 @@ from pathlib import Path
 from nanoid import generate
 from rich_argparse import RichHelpFormatter
 
+from apollo_oracle.core import list_plugins
+from apollo_oracle.utils.map_service import load_map_service
+from apollo_oracle.utils.vehicle_param import VehicleParam
 from apollo_resim import re_simulate
 from config import CONFIG
 
@@ -25,6 +28,23 @@ def main():
         help="Map name (must exist under data/maps/<map_name>/base_map.bin)",
     )
 
+    parser.add_argument(
+        "-o",
+        "--oracles",
+        default=[],
+        nargs="+",
+        help="Oracles evaluated live; the scenario stops at the first violation",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--vehicle",
+        default=str(
+            Path(CONFIG.PROJECT_ROOT, "data", "vehicle_params", "Mkz_Example.txt")
+        ),
+        help="Path of the vehicle_param protobuf file used by the oracles",
+    )
+
     args = parser.parse_args()
 
     src = Path(args.src_record)
@@ -57,11 +77,29 @@ def main():
     if not start_script.exists():
         parser.error("Apollo start script not found")
 
-    re_simulate(
+    oracles = []
+    if args.oracles:
+        plugins = list_plugins()
+        for name in args.oracles:
+            if name not in plugins:
+                parser.error(f"Oracle not found: {name}")
+        if not Path(args.vehicle).exists():
+            parser.error("Specified vehicle param file does not exist!")
+        map_service = load_map_service(map_bin)
+        vehicle_param = VehicleParam.load_from_file(Path(args.vehicle))
+        oracles = [
+            plugins[name](map_service, vehicle_param, vars(args))
+            for name in args.oracles
+        ]
+
+    violations = re_simulate(
         apollo_root=CONFIG.APOLLO_ROOT,
         container_name=generate(alphabet=string.ascii_letters, size=10),
         start_script=str(start_script),
         map_bin=str(map_bin),
         src=str(src),
         dst=str(dst),
+        oracles=oracles,
     )
+    for violation in violations:
+        print(violation)
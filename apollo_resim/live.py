@@ -0,0 +1,182 @@
+import socket
+import time
+import traceback
+from functools import partial
+from threading import Event
+from typing import Any, Dict, List, Optional, Set
+
+from apollo_container.cyber_bridge import Channel, Channels, CyberBridge
+from apollo_oracle.core import (
+    ROUTING_REQUEST_TOPIC,
+    OracleDispatcher,
+    OracleExtension,
+    OracleInterrupt,
+    Violation,
+    ViolationSink,
+    collect_violations,
+)
+
+# channels the bridge can subscribe to, by topic
+BRIDGE_CHANNELS: Dict[str, Channel] = {
+    c.name: c for c in vars(Channels).values() if isinstance(c, Channel)
+}
+
+
+def connect_bridge(host: str, port: int = 9090, timeout: float = 30.0) -> CyberBridge:
+    """
+    Connects to a cyber bridge, retrying while it is starting up
+
+    :param str host: IP address of the cyber bridge
+    :param int port: port of the cyber bridge
+    :param float timeout: seconds to keep retrying
+
+    :returns: the connected bridge client
+    :rtype: CyberBridge
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return CyberBridge(host, port)
+        except (ConnectionRefusedError, socket.timeout):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+class LiveOracleRunner(ViolationSink):
+    """
+    Evaluates oracles on the messages of a running scenario, received through
+    the cyber bridge, like analyze_record does on a finished record. Once an
+    oracle emits a triggered violation, or every oracle is done, ``stop_event``
+    is set so that the scenario can be stopped early.
+
+    Messages are handled by the thread of the bridge. Batches are delivered
+    after every message, so that verdicts are never delayed.
+
+    :param List[OracleExtension] oracle_instances: oracles to evaluate
+    :param CyberBridge bridge: connected bridge client, not spinning yet
+    :param ViolationSink sink: receives every violation as it occurs
+    """
+
+    def __init__(
+        self,
+        oracle_instances: List[OracleExtension],
+        bridge: CyberBridge,
+        sink: Optional[ViolationSink] = None,
+    ) -> None:
+        self.oracle_instances = list(oracle_instances)
+        self.bridge = bridge
+        self.sink = sink
+        self.dispatcher = OracleDispatcher(self.oracle_instances)
+        for oracle_instance in self.oracle_instances:
+            oracle_instance.sink = self
+        self.stop_event = Event()
+        # first triggered violation, if any
+        self.violation: Optional[Violation] = None
+        self.error: Optional[str] = None
+        self.found_routing_request = False
+        self.stopped = False
+        self.subscribed: Set[str] = set()
+        # topics of oracles without a bridge channel, never received
+        self.unsupported_topics: Set[str] = set()
+
+    def emit(self, violation: Violation) -> None:
+        if self.sink is not None:
+            self.sink.emit(violation)
+        if violation.triggered and self.violation is None:
+            self.violation = violation
+            self.stop_event.set()
+
+    def _subscribe(self):
+        """
+        Subscribes the bridge to the topics oracles are subscribed to; the
+        bridge cannot unsubscribe, but unsubscribed topics are not dispatched
+        """
+        for topic in [ROUTING_REQUEST_TOPIC, *self.dispatcher.topics]:
+            if topic in self.subscribed or topic in self.unsupported_topics:
+                continue
+            if topic not in BRIDGE_CHANNELS:
+                self.unsupported_topics.add(topic)
+                continue
+            self.bridge.add_subscriber(
+                BRIDGE_CHANNELS[topic], partial(self.on_message, topic)
+            )
+            self.subscribed.add(topic)
+
+    def start(self):
+        """
+        Subscribes to the topics of the oracles and starts receiving messages
+        """
+        self._subscribe()
+        self.bridge.spin()
+
+    def on_message(self, topic: str, msg: Any):
+        """
+        Dispatches a message received from the bridge to the oracles
+
+        :param str topic: channel of the message
+        :param Any msg: the parsed message
+        """
+        if self.stopped:
+            return
+        if topic == ROUTING_REQUEST_TOPIC:
+            self.found_routing_request = True
+        if not self.found_routing_request:
+            return
+
+        # messages are timed by their header, as record messages are timed
+        # by the recorder
+        if hasattr(msg, 'header'):
+            t = int(msg.header.timestamp_sec * 1e9)
+        else:
+            t = time.time_ns()
+        try:
+            self.dispatcher.dispatch(topic, msg, t)
+            self.dispatcher.flush()
+        except OracleInterrupt:
+            self.stopped = True
+        except Exception:
+            self.error = traceback.format_exc()
+            self.stopped = True
+
+        if self.dispatcher.subscriptions_changed:
+            self.dispatcher.subscriptions_changed = False
+            self._subscribe()
+        if self.stopped or self.dispatcher.done:
+            self.stop_event.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Waits until the scenario can be stopped
+
+        :param float timeout: seconds to wait at most, forever if None
+
+        :returns: whether the scenario can be stopped before the timeout
+        :rtype: bool
+        """
+        return self.stop_event.wait(timeout)
+
+    def stop(self, complete: bool = False) -> List[Violation]:
+        """
+        Stops receiving messages and collects the violations of the oracles.
+        Unless the scenario ran to completion, the verdicts of oracles that
+        are not done, e.g. deciding at the end of the scenario, would be
+        computed on a truncated scenario; only the violations they emitted
+        so far are returned.
+
+        :param bool complete: whether the scenario ran to completion
+
+        :returns: violations of every oracle
+        :rtype: List[Violation]
+        """
+        self.bridge.stop()
+        self.stopped = True
+        # messages after an error were not dispatched
+        complete = complete and self.error is None
+        violations: List[Violation] = list()
+        for oracle_instance in self.oracle_instances:
+            if complete or oracle_instance.done:
+                violations.extend(collect_violations([oracle_instance], self.sink))
+            else:
+                violations.extend(oracle_instance.emitted)
+        return violations
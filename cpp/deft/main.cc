@@ -14,6 +14,8 @@
 
 
 #include <chrono>
+#include <cstdio>
+#include <fstream>
 #include <iostream>
 #include <map>
 #include <string>
@@ -107,9 +109,23 @@ int main(int argc, char *argv[]) {
     ? "/home/" + std::string(user) + "/deft/testdata" 
     : "/apollo/modules/deft/testdata";
 
+  // allow test data to live in a directory shared with the host, so that
+  // outputs can be validated while the module tests are still running
+  const char* testdata_dir = std::getenv("DEFT_TESTDATA_DIR");
+  if (testdata_dir != nullptr) {
+    deft_tmp_dir = std::string(testdata_dir);
+  }
+  std::remove((deft_tmp_dir + "/deft.done").c_str());
+
   int input_seq_num = 0;
 
   while (true) {
+    // stop once validation found a divergence beyond its abort threshold
+    if (std::ifstream(deft_tmp_dir + "/deft.abort").good()) {
+      std::cout << "DeFT Aborted at Frame " << input_seq_num << std::endl;
+      break;
+    }
+
     std::cout << "DeFT Processing Frame " << input_seq_num << std::endl;
     auto frame_start = std::chrono::steady_clock::now();
     // check if 0_planning.bin exists
@@ -176,16 +192,24 @@ int main(int argc, char *argv[]) {
     std::string output_file_name =
         deft_tmp_dir + "/" + std::to_string(input_seq_num) + "/deft.bin";
 
+    // write to a temporary file first, so deft.bin only appears complete
     apollo::cyber::common::SetProtoToBinaryFile(adc_trajectory_pb,
-                                                output_file_name);
+                                                output_file_name + ".tmp");
+    std::rename((output_file_name + ".tmp").c_str(), output_file_name.c_str());
     // apollo::cyber::common::SetProtoToASCIIFile(adc_trajectory_pb,
     // output_file_name);
 
     auto frame_planning = std::chrono::steady_clock::now();
-    auto io_elapsed = frame_io - frame_start;
+    std::chrono::duration<double> io_elapsed = frame_io - frame_start;
+    std::chrono::duration<double> planning_elapsed = frame_planning - frame_io;
+
+    std::cout << "DeFT Frame " << input_seq_num
+              << " IO TIME: " << io_elapsed.count() << " seconds"
+              << " PLANNING TIME: " << planning_elapsed.count() << " seconds"
+              << std::endl;
 
-    io_duration += (frame_io - frame_start);
-    planning_duration += (frame_planning - frame_io);
+    io_duration += io_elapsed;
+    planning_duration += planning_elapsed;
 
     input_seq_num++;
   }
@@ -193,6 +217,9 @@ int main(int argc, char *argv[]) {
   auto final_end = std::chrono::steady_clock::now();
   std::chrono::duration<double> total_elapsed = final_end - init_start;
 
+  // mark the outputs as complete
+  std::ofstream(deft_tmp_dir + "/deft.done").close();
+
   std::cout << "stopped at input_seq_num: " << input_seq_num << std::endl;
   std::cout << "INIT TIME: " << init_elapsed.count() << " seconds" << std::endl;
   std::cout << "TOTAL TIME: " << total_elapsed.count() << " seconds"
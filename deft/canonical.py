@@ -0,0 +1,145 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from apollo_modules.modules.planning.proto.planning_pb2 import ADCTrajectory
+
+# fields of ADCTrajectory that differ between executions of identical inputs
+VOLATILE_FIELDS = [
+    'header.timestamp_sec',
+    'header.sequence_num',
+    'header.lidar_timestamp',
+    'header.camera_timestamp',
+    'header.radar_timestamp',
+    'latency_stats',
+    'debug.planning_data.open_space.time_latency',
+]
+
+# suffix of files storing the canonical digest of a planning message file
+DIGEST_SUFFIX = '.digest'
+
+
+def mask_volatile_fields(msg: ADCTrajectory) -> ADCTrajectory:
+    """
+    Clear volatile fields of a planning message in place.
+
+    Args:
+        msg (ADCTrajectory): The planning message.
+
+    Returns:
+        ADCTrajectory: The same message, for chaining.
+    """
+    for path in VOLATILE_FIELDS:
+        *parents, name = path.split('.')
+        node = msg
+        for parent in parents:
+            if not node.HasField(parent):
+                node = None
+                break
+            node = getattr(node, parent)
+        if node is not None:
+            node.ClearField(name)
+    return msg
+
+
+def canonicalize(data: bytes) -> bytes:
+    """
+    Convert a serialized planning message into its canonical form, where
+    volatile fields are masked and serialization is deterministic.
+
+    Args:
+        data (bytes): The serialized ADCTrajectory.
+
+    Returns:
+        bytes: The canonical serialization.
+    """
+    msg = ADCTrajectory()
+    msg.ParseFromString(data)
+    return mask_volatile_fields(msg).SerializeToString(deterministic=True)
+
+
+def digest_message(msg: ADCTrajectory) -> str:
+    """
+    Compute the digest of the canonical form of a parsed planning message.
+    Volatile fields of the message are cleared in place.
+
+    Args:
+        msg (ADCTrajectory): The planning message.
+
+    Returns:
+        str: The hex SHA-256 digest.
+    """
+    canonical = mask_volatile_fields(msg).SerializeToString(deterministic=True)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+def canonical_digest(data: bytes) -> str:
+    """
+    Compute the digest of the canonical form of a planning message.
+
+    Args:
+        data (bytes): The serialized ADCTrajectory.
+
+    Returns:
+        str: The hex SHA-256 digest.
+    """
+    return hashlib.sha256(canonicalize(data)).hexdigest()
+
+
+def read_stored_digest(filename: Path) -> Optional[str]:
+    """
+    Read the digest stored alongside a planning message file.
+
+    Args:
+        filename (Path): The binary planning message file.
+
+    Returns:
+        Optional[str]: The stored digest, or None if there is none or the
+            file changed after it was stored.
+    """
+    digest_file = Path(f'{filename}{DIGEST_SUFFIX}')
+    try:
+        stored = json.loads(digest_file.read_text())
+        stat = Path(filename).stat()
+    except (OSError, ValueError):
+        return None
+    if stored.get('size') != stat.st_size or stored.get('mtime_ns') != stat.st_mtime_ns:
+        return None
+    return stored.get('digest')
+
+
+def store_digest(filename: Path, digest: str):
+    """
+    Store the digest of a planning message file alongside it, together with
+    the size and modification time of the file to detect later changes.
+
+    Args:
+        filename (Path): The binary planning message file.
+        digest (str): The canonical digest of the file.
+    """
+    stat = Path(filename).stat()
+    Path(f'{filename}{DIGEST_SUFFIX}').write_text(
+        json.dumps(
+            {'digest': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        )
+    )
+
+
+def digest_planning_bin(filename: Path) -> str:
+    """
+    Compute the canonical digest of a planning message stored in a file.
+    A stored digest is reused when the file did not change, and a computed
+    one is stored.
+
+    Args:
+        filename (Path): The binary planning message file.
+
+    Returns:
+        str: The hex SHA-256 digest.
+    """
+    digest = read_stored_digest(filename)
+    if digest is None:
+        digest = canonical_digest(Path(filename).read_bytes())
+        store_digest(filename, digest)
+    return digest
@@ -2,8 +2,13 @@ import argparse
 
 from rich_argparse import RichHelpFormatter
 
+from deft.diff import main as diff_main
 from deft.execute import main as execute_main
 from deft.extract import main as extract_main
+from deft.pipeline import main as pipeline_main
+from deft.reruns import main as reruns_main
+from deft.scheduler import main as batch_main
+from deft.stress import main as stress_main
 from deft.validate import main as validate_main
 
 
@@ -33,5 +38,35 @@ def main():
     )
     validate_main(validate_parser)
 
+    # Pipeline command
+    pipeline_parser = subparsers.add_parser(
+        "pipeline", help="Extract, execute and validate module tests in a pipeline"
+    )
+    pipeline_main(pipeline_parser)
+
+    # Batch command
+    batch_parser = subparsers.add_parser(
+        "batch", help="Schedule extract, execute and validate jobs in batches"
+    )
+    batch_main(batch_parser)
+
+    # Stress command
+    stress_parser = subparsers.add_parser(
+        "stress", help="Execute module tests repeatedly and check determinism"
+    )
+    stress_main(stress_parser)
+
+    # Diff command
+    diff_parser = subparsers.add_parser(
+        "diff", help="Compare reproduced and recorded planning messages field by field"
+    )
+    diff_main(diff_parser)
+
+    # Reruns command
+    reruns_parser = subparsers.add_parser(
+        "reruns", help="Compare planning trajectories of reruns with a reference record"
+    )
+    reruns_main(reruns_parser)
+
     args = parser.parse_args()
     args.func(args)
@@ -143,48 +143,72 @@ class DeFTBase:
             write_ascii (bool): Whether to write ASCII files.
         """
         for index, frame in enumerate(frames):
-            target_dir = Path(testdata_dir, str(index))
-            target_dir.mkdir(parents=True)
-            for planning_input_topic in PLANNING_INPUT_TOPICS:
-                msg_sequence_num = frame.get_sequence_number_for_topic(
-                    planning_input_topic
-                )
-
-                # check if input topic is tracked
-                if (planning_input_topic not in self.messages) or (
-                    msg_sequence_num not in self.messages[planning_input_topic]
-                ):
-                    msg = get_empty_message(planning_input_topic)
-                else:
-                    msg, _ = self.messages[planning_input_topic][
-                        frame.get_sequence_number_for_topic(planning_input_topic)
-                    ]
-                topic_short_name = get_topic_short_name(planning_input_topic)
-
-                if write_binary:
-                    with open(Path(target_dir, f'{topic_short_name}.bin'), 'wb') as fp:
-                        fp.write(msg.SerializeToString())
-                if write_ascii:
-                    with open(
-                        Path(target_dir, f'{topic_short_name}.pb.txt'), 'w'
-                    ) as fp:
-                        fp.write(str(msg))
-
-            planning_msg, _ = self.messages.get(ApolloTopics.PLANNING).get(
-                frame.planning_header_seq
+            self.write_frame_to_file(
+                index, frame, testdata_dir, write_binary, write_ascii
             )
-            if write_binary:
-                with open(Path(target_dir, 'planning.bin'), 'wb') as fp:
-                    fp.write(planning_msg.SerializeToString())
-            if write_ascii:
-                with open(Path(target_dir, 'planning.pb.txt'), 'w') as fp:
-                    fp.write(str(planning_msg))
 
-            deft_header = planning_msg.header
-            deft_header.timestamp_sec = frame.timestamp
+    def write_frame_to_file(
+        self,
+        index: int,
+        frame: Frame,
+        testdata_dir: Path,
+        write_binary=True,
+        write_ascii=False,
+    ) -> Path:
+        """
+        Write a single extracted frame to files.
+
+        Args:
+            index (int): The index of the frame.
+            frame (Frame): The frame to write.
+            testdata_dir (Path): The directory to write the files to.
+            write_binary (bool): Whether to write binary files.
+            write_ascii (bool): Whether to write ASCII files.
+
+        Returns:
+            Path: The directory the frame was written to.
+        """
+        target_dir = Path(testdata_dir, str(index))
+        target_dir.mkdir(parents=True)
+        for planning_input_topic in PLANNING_INPUT_TOPICS:
+            msg_sequence_num = frame.get_sequence_number_for_topic(
+                planning_input_topic
+            )
+
+            # check if input topic is tracked
+            if (planning_input_topic not in self.messages) or (
+                msg_sequence_num not in self.messages[planning_input_topic]
+            ):
+                msg = get_empty_message(planning_input_topic)
+            else:
+                msg, _ = self.messages[planning_input_topic][
+                    frame.get_sequence_number_for_topic(planning_input_topic)
+                ]
+            topic_short_name = get_topic_short_name(planning_input_topic)
+
             if write_binary:
-                with open(Path(target_dir, 'header.bin'), 'wb') as fp:
-                    fp.write(deft_header.SerializeToString())
+                with open(Path(target_dir, f'{topic_short_name}.bin'), 'wb') as fp:
+                    fp.write(msg.SerializeToString())
             if write_ascii:
-                with open(Path(target_dir, 'header.pb.txt'), 'w') as fp:
-                    fp.write(str(deft_header))
+                with open(Path(target_dir, f'{topic_short_name}.pb.txt'), 'w') as fp:
+                    fp.write(str(msg))
+
+        planning_msg, _ = self.messages.get(ApolloTopics.PLANNING).get(
+            frame.planning_header_seq
+        )
+        if write_binary:
+            with open(Path(target_dir, 'planning.bin'), 'wb') as fp:
+                fp.write(planning_msg.SerializeToString())
+        if write_ascii:
+            with open(Path(target_dir, 'planning.pb.txt'), 'w') as fp:
+                fp.write(str(planning_msg))
+
+        deft_header = planning_msg.header
+        deft_header.timestamp_sec = frame.timestamp
+        if write_binary:
+            with open(Path(target_dir, 'header.bin'), 'wb') as fp:
+                fp.write(deft_header.SerializeToString())
+        if write_ascii:
+            with open(Path(target_dir, 'header.pb.txt'), 'w') as fp:
+                fp.write(str(deft_header))
+        return target_dir
@@ -7,17 +7,21 @@ import docker
 
 
 class DeFTContainer:
-    def __init__(self, apollo_dir: str, user: str):
+    def __init__(self, apollo_dir: str, user: str, container_name: str = None):
         """
         Initialize the DeFTContainer.
 
         Args:
             apollo_dir (str): The directory where Apollo is located.
             user (str): The user to run the container as.
+            container_name (str): The name of the container. Defaults to
+                ``apollo_dev_{user}``.
         """
         self.apollo_dir = Path(apollo_dir)
         self.user = user
-        self.container_name = f'apollo_dev_{user}'
+        self.container_name = (
+            container_name if container_name is not None else f'apollo_dev_{user}'
+        )
         self.client = docker.from_env()
 
     def install(self, show_container_output=False):
@@ -225,50 +229,66 @@ class DeFTContainer:
         ]
         subprocess.run(copy_command, check=True, capture_output=True)
 
-    def _execute_command(self, command: List[str], show_container_output=False):
+    def _execute_command(self, command: List[str], show_container_output=False) -> str:
         """
         Prepares and executes a command in the DeFT container.
 
         Args:
             command (List[str]): The command to execute.
             show_container_output (bool): Whether to show the container output.
+
+        Returns:
+            str: The standard output of the command.
         """
         my_env = os.environ.copy()
         my_env['USER'] = self.user
-        try:
-            if not show_container_output:
-                subprocess.run(
+        if not show_container_output:
+            try:
+                result = subprocess.run(
                     command,
                     check=True,
                     env=my_env,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                 )
-            else:
-                subprocess.run(command, check=True, env=my_env)
-        except subprocess.CalledProcessError as e:
-            raise Exception(
-                f'Command failed with exit code {e.returncode}: '
-                f'{e.stderr.decode().strip()}'
-            )
+            except subprocess.CalledProcessError as e:
+                raise Exception(
+                    f'Command failed with exit code {e.returncode}: '
+                    f'{e.stderr.decode().strip()}'
+                )
+            return result.stdout.decode()
+
+        # stream the output while keeping a copy of it
+        lines = []
+        with subprocess.Popen(
+            command, env=my_env, stdout=subprocess.PIPE, text=True
+        ) as proc:
+            for line in proc.stdout:
+                print(line, end='')
+                lines.append(line)
+        if proc.returncode != 0:
+            raise Exception(f'Command failed with exit code {proc.returncode}')
+        return ''.join(lines)
 
-    def deft_run_tests(self, show_container_output=False):
+    def deft_run_tests(
+        self, show_container_output=False, testdata_dir: str = None
+    ) -> str:
         """
         Execute the DeFT test suite.
 
         Args:
             show_container_output (bool): Whether to show the container output.
+            testdata_dir (str): The test data directory inside the container.
+                Defaults to the directory used by ``load_testdata``.
+
+        Returns:
+            str: The output of the DeFT runner.
         """
-        command = [
-            'docker',
-            'exec',
-            '-u',
-            self.user,
-            self.container_name,
-            'bash',
-            '/apollo/modules/deft/deft.sh',
-        ]
-        self._execute_command(command, show_container_output)
+        command = ['docker', 'exec', '-u', self.user]
+        if testdata_dir is not None:
+            command += ['-e', f'DEFT_TESTDATA_DIR={testdata_dir}']
+        command += [self.container_name, 'bash', '/apollo/modules/deft/deft.sh']
+        return self._execute_command(command, show_container_output)
 
     def deft_coverage(self, show_container_output=False):
         """
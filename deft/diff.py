@@ -0,0 +1,330 @@
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, NamedTuple
+
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import Message
+
+from deft.canonical import VOLATILE_FIELDS
+from deft.validate import (
+    FRAME_FILES,
+    list_frames,
+    load_messages,
+    stored_digests_match,
+)
+
+# field types whose values are not meaningfully subtracted
+_NON_NUMERIC_TYPES = {
+    FieldDescriptor.TYPE_BOOL,
+    FieldDescriptor.TYPE_ENUM,
+    FieldDescriptor.TYPE_STRING,
+    FieldDescriptor.TYPE_BYTES,
+}
+
+
+class FieldDelta(NamedTuple):
+    """
+    Divergence of a single field path, accumulated over frames.
+    """
+
+    # number of frames in which the field differs
+    frames: int
+    # number of differing values, counting every element of repeated fields
+    values: int
+    # largest absolute difference of numeric values, NaN if there is none
+    max_delta: float
+
+
+def merge_deltas(lhs: FieldDelta, rhs: FieldDelta) -> FieldDelta:
+    """
+    Combine the divergence of a field path in two disjoint sets of frames.
+
+    Args:
+        lhs (FieldDelta): The first divergence.
+        rhs (FieldDelta): The second divergence.
+
+    Returns:
+        FieldDelta: The combined divergence.
+    """
+    if math.isnan(lhs.max_delta):
+        max_delta = rhs.max_delta
+    elif math.isnan(rhs.max_delta):
+        max_delta = lhs.max_delta
+    else:
+        max_delta = max(lhs.max_delta, rhs.max_delta)
+    return FieldDelta(lhs.frames + rhs.frames, lhs.values + rhs.values, max_delta)
+
+
+def aggregate_diffs(diffs: Iterable[Dict[str, FieldDelta]]) -> Dict[str, FieldDelta]:
+    """
+    Aggregate divergence by field path.
+
+    Args:
+        diffs (Iterable[Dict[str, FieldDelta]]): Divergences of several frames
+            or groups of frames.
+
+    Returns:
+        Dict[str, FieldDelta]: The divergence of every field path.
+    """
+    total = dict()
+    for diff in diffs:
+        for path, delta in diff.items():
+            total[path] = merge_deltas(total[path], delta) if path in total else delta
+    return total
+
+
+def _record(diff: Dict[str, List[float]], path: str, delta: float):
+    # per frame, differing values are collected as [count, max |delta|]
+    entry = diff.setdefault(path, [0, float('nan')])
+    entry[0] += 1
+    if not math.isnan(delta) and (math.isnan(entry[1]) or abs(delta) > entry[1]):
+        entry[1] = abs(delta)
+
+
+def _scalar_delta(field: FieldDescriptor, expected, actual) -> float:
+    if field.type in _NON_NUMERIC_TYPES:
+        return float('nan')
+    return float(actual) - float(expected)
+
+
+def _diff_values(field, path, expected, actual, diff, ignore):
+    if field.type == FieldDescriptor.TYPE_MESSAGE:
+        _diff_message(expected, actual, f'{path}.', diff, ignore)
+    elif expected != actual:
+        _record(diff, path, _scalar_delta(field, expected, actual))
+
+
+def _serialize(msg: Message) -> bytes:
+    return msg.SerializeToString(deterministic=True)
+
+
+def _unset_value(field: FieldDescriptor):
+    if field.label == FieldDescriptor.LABEL_REPEATED:
+        return ()
+    if field.type == FieldDescriptor.TYPE_MESSAGE:
+        return None
+    return field.default_value
+
+
+def _diff_message(expected: Message, actual: Message, prefix: str, diff, ignore):
+    # identical submessages are skipped without walking their fields
+    if _serialize(expected) == _serialize(actual):
+        return
+
+    # only fields set in either message are walked
+    values = {f: [v, _unset_value(f)] for f, v in expected.ListFields()}
+    for field, value in actual.ListFields():
+        values.setdefault(field, [_unset_value(field), None])[1] = value
+    for field, (lhs, rhs) in values.items():
+        path = prefix + field.name
+        if path in ignore:
+            continue
+
+        if field.label != FieldDescriptor.LABEL_REPEATED:
+            if lhs is None or rhs is None:
+                # submessage present in only one message
+                _record(diff, path, float('nan'))
+            else:
+                _diff_values(field, path, lhs, rhs, diff, ignore)
+            continue
+
+        element_path = f'{path}[*]'
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            value_field = field.message_type.fields_by_name['value']
+            for key in set(lhs) | set(rhs):
+                if key not in lhs or key not in rhs:
+                    _record(diff, element_path, float('nan'))
+                else:
+                    _diff_values(
+                        value_field, element_path, lhs[key], rhs[key], diff, ignore
+                    )
+            continue
+
+        # missing or extra elements are counted at the repeated field itself
+        if len(lhs) != len(rhs):
+            _record(diff, path, float(len(rhs) - len(lhs)))
+        for lhs_value, rhs_value in zip(lhs, rhs):
+            _diff_values(field, element_path, lhs_value, rhs_value, diff, ignore)
+
+
+def diff_messages(
+    expected: Message,
+    actual: Message,
+    ignore: Collection[str] = VOLATILE_FIELDS,
+) -> Dict[str, FieldDelta]:
+    """
+    Compare two messages of the same type field by field. Elements of
+    repeated fields are compared by position and share the path of the
+    field suffixed with ``[*]``, e.g. ``trajectory_point[*].v``.
+
+    Args:
+        expected (Message): The recorded message.
+        actual (Message): The reproduced message.
+        ignore (Collection[str]): Field paths that are not compared.
+
+    Returns:
+        Dict[str, FieldDelta]: The divergence of every differing field path.
+            Deltas are reproduced minus recorded values; non-numeric fields
+            and fields present in only one message have no delta.
+    """
+    diff = dict()
+    _diff_message(expected, actual, '', diff, frozenset(ignore))
+    return {
+        path: FieldDelta(1, count, max_delta)
+        for path, (count, max_delta) in diff.items()
+    }
+
+
+def diff_frame(frame_dir: Path) -> Dict[str, FieldDelta]:
+    """
+    Compare the reproduced and the recorded planning message of a frame.
+
+    Args:
+        frame_dir (Path): Directory containing ``deft.bin`` and
+            ``planning.bin`` of the frame.
+
+    Returns:
+        Dict[str, FieldDelta]: The divergence of every differing field path.
+    """
+    if stored_digests_match(frame_dir):
+        return dict()
+    messages = load_messages(frame_dir)
+    actual, expected = (messages[name] for name in FRAME_FILES)
+    return diff_messages(expected, actual)
+
+
+def diff_frames(frame_dirs: List[Path]) -> Dict[str, FieldDelta]:
+    """
+    Compare a group of frames and aggregate divergence by field path.
+    Frames without ``deft.bin`` are skipped.
+
+    Args:
+        frame_dirs (List[Path]): Frame directories to compare.
+
+    Returns:
+        Dict[str, FieldDelta]: The divergence of every differing field path.
+    """
+    return aggregate_diffs(
+        diff_frame(d) for d in frame_dirs if (d / 'deft.bin').exists()
+    )
+
+
+def run_diff(
+    outputs_dir: Path, frames: Collection[int] = (), workers: int = 1
+) -> Dict[str, FieldDelta]:
+    """
+    Compare reproduced and recorded planning messages of a suite field by
+    field, and aggregate divergence by field path.
+
+    Args:
+        outputs_dir (Path): Directory containing execution outputs.
+        frames (Collection[int]): Indices of frames to compare. All frames
+            are compared if empty.
+        workers (int): Number of worker processes.
+
+    Returns:
+        Dict[str, FieldDelta]: The divergence of every differing field path.
+    """
+    frame_dirs = list_frames(outputs_dir)
+    if frames:
+        frames = set(frames)
+        frame_dirs = [d for d in frame_dirs if int(d.name) in frames]
+
+    if workers <= 1 or len(frame_dirs) <= 1:
+        return diff_frames(frame_dirs)
+    chunk_size = -(-len(frame_dirs) // (workers * 4))
+    chunks = [
+        frame_dirs[i : i + chunk_size] for i in range(0, len(frame_dirs), chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return aggregate_diffs(executor.map(diff_frames, chunks))
+
+
+def print_diff(diff: Dict[str, FieldDelta], top: int = None):
+    """
+    Print the divergence of field paths, most frequently differing first.
+
+    Args:
+        diff (Dict[str, FieldDelta]): The divergence of every field path.
+        top (int): Number of field paths to print. All are printed if None.
+    """
+    if not diff:
+        print('No differing fields')
+        return
+    paths = sorted(diff, key=lambda p: (-diff[p].frames, -diff[p].values, p))
+    if top is not None:
+        paths = paths[: max(top, 0)]
+    width = max((len(p) for p in paths), default=len('Field'))
+    print(f'{"Field":<{width}}  {"Frames":>6}  {"Values":>8}  Max delta')
+    for path in paths:
+        delta = diff[path]
+        counts = f'{delta.frames:>6}  {delta.values:>8}'
+        print(f'{path:<{width}}  {counts}  {delta.max_delta:.6g}')
+
+
+def main(parser):
+    parser.add_argument(
+        '--outputs-dir',
+        default='out/testdata_out',
+        help='Directory containing execution outputs',
+    )
+
+    parser.add_argument(
+        '--frames',
+        type=int,
+        nargs='+',
+        default=[],
+        help='Indices of frames to compare (default: all frames)',
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of worker processes comparing messages',
+    )
+
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=None,
+        help='Number of most frequently differing field paths to print',
+    )
+
+    def handler(args):
+        outputs_dir = Path(args.outputs_dir)
+
+        if not outputs_dir.exists():
+            parser.error('Outputs directory does not exist')
+
+        if args.workers < 1:
+            parser.error('Number of workers must be positive')
+
+        if args.top is not None and args.top < 1:
+            parser.error('Number of field paths to print must be positive')
+
+        diff = run_diff(outputs_dir, args.frames, args.workers)
+        print_diff(diff, args.top)
+
+        diff_file = outputs_dir / 'diff.json'
+        with open(diff_file, 'w') as f:
+            # frames without numeric deltas are stored with a null max delta
+            json.dump(
+                {
+                    path: dict(
+                        delta._asdict(),
+                        max_delta=None
+                        if math.isnan(delta.max_delta)
+                        else delta.max_delta,
+                    )
+                    for path, delta in diff.items()
+                },
+                f,
+                indent=2,
+            )
+        print(f'Diff saved to {diff_file}')
+
+    parser.set_defaults(func=handler)
@@ -1,35 +1,64 @@
-import shutil
+import time
 from pathlib import Path
 
-from config import CONFIG
-from deft.deft_container import DeFTContainer
+from deft.runner import RUNNERS, DeFTRunner, DockerRunner, LocalRunner, load_planner
+from deft.runner.metrics import ExecutionMetrics
 
 
-def run_execute(frames_dir: Path, outputs_dir: Path):
-    print("Starting DeFT container...")
-    ctn = DeFTContainer(Path(CONFIG.APOLLO_ROOT), "deft")
+def run_execute(
+    frames_dir: Path, outputs_dir: Path, runner: DeFTRunner = None
+) -> ExecutionMetrics:
+    if runner is None:
+        runner = DockerRunner()
 
-    if not ctn.is_running():
-        ctn.start()
+    start = time.perf_counter()
+    metrics = runner.run(frames_dir, outputs_dir)
+    metrics.wall_time = time.perf_counter() - start
+    metrics.write(outputs_dir / "metrics.json")
 
-    assert ctn.is_running()
+    print(f"Outputs saved to {outputs_dir}")
+    print_metrics(metrics)
+    return metrics
 
-    if outputs_dir.exists():
-        shutil.rmtree(outputs_dir)
 
-    print("Loading testdata into container...")
-    ctn.load_testdata(frames_dir)
+def print_metrics(metrics: ExecutionMetrics):
+    print("Executed frames:", metrics.num_frames)
+    print("Init time:", metrics.init_time)
+    print("Total time:", metrics.total_time)
+    print("IO time:", metrics.io_time)
+    print("Planning time:", metrics.planning_time)
+    for name, value in metrics.planning_latency_percentiles().items():
+        print(f"Planning latency {name}:", value)
 
-    print("Running DeFT tests...")
-    ctn.deft_run_tests()
 
-    print("Saving outputs...")
-    ctn.save_testdata(outputs_dir)
+def add_runner_arguments(parser):
+    parser.add_argument(
+        "--runner",
+        default=DockerRunner.get_name(),
+        choices=list(RUNNERS.keys()),
+        help="Backend used to execute module tests",
+    )
 
-    ctn.stop()
-    ctn.remove()
+    parser.add_argument(
+        "--planner",
+        default="echo",
+        help="Planner stand-in for the local runner (name or module:Class)",
+    )
 
-    print(f"Outputs saved to {outputs_dir}")
+    parser.add_argument(
+        "--live-outputs",
+        action="store_true",
+        help="Make outputs of the docker runner visible while it is running",
+    )
+
+
+def create_runner(args, container_name: str = None) -> DeFTRunner:
+    if args.runner == LocalRunner.get_name():
+        return LocalRunner(load_planner(args.planner))
+    return DockerRunner(
+        container_name=container_name,
+        live_outputs=getattr(args, "live_outputs", False),
+    )
 
 
 def main(parser):
@@ -45,6 +74,8 @@ def main(parser):
         help="Directory to store execution outputs",
     )
 
+    add_runner_arguments(parser)
+
     def handler(args):
         frames_dir = Path(args.frames_dir)
         outputs_dir = Path(args.outputs_dir)
@@ -52,6 +83,11 @@ def main(parser):
         if not frames_dir.exists():
             parser.error("Frames directory does not exist")
 
-        run_execute(frames_dir, outputs_dir)
+        try:
+            runner = create_runner(args)
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(str(e))
+
+        run_execute(frames_dir, outputs_dir, runner)
 
     parser.set_defaults(func=handler)
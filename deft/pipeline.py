@@ -0,0 +1,211 @@
+import shutil
+import threading
+from pathlib import Path
+from queue import Empty, Full, Queue
+
+from config import CONFIG
+from deft.deft import DeFTLog
+from deft.execute import add_runner_arguments, create_runner
+from deft.runner import DeFTRunner
+from deft.validate import print_summary, verify_frame
+
+# marks the end of a stage's output
+_END = None
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _Stage(threading.Thread):
+    """
+    A pipeline stage running in its own thread. A failing stage cancels the
+    whole pipeline so no stage stays blocked on a queue, and the end marker
+    is always forwarded so downstream stages terminate.
+    """
+
+    def __init__(self, name: str, target, stop: threading.Event, downstream=None):
+        super().__init__(name=name, daemon=True)
+        self.target = target
+        self.stop = stop
+        self.downstream = downstream
+        self.error = None
+
+    def run(self):
+        try:
+            self.target()
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            self.error = e
+            self.stop.set()
+        finally:
+            if self.downstream is not None:
+                try:
+                    _put(self.downstream, _END, self.stop)
+                except _Cancelled:
+                    pass
+
+
+def _put(q: Queue, item, stop: threading.Event):
+    """
+    Put ``item`` into the bounded queue ``q`` unless the pipeline is cancelled.
+    """
+    while True:
+        if stop.is_set():
+            raise _Cancelled
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except Full:
+            continue
+
+
+def _drain(q: Queue, stop: threading.Event):
+    """
+    Yield items of ``q`` until the end marker is received.
+    """
+    while True:
+        if stop.is_set():
+            raise _Cancelled
+        try:
+            item = q.get(timeout=0.1)
+        except Empty:
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def run_pipeline(
+    record_path: Path,
+    frames_dir: Path,
+    outputs_dir: Path,
+    runner: DeFTRunner,
+    queue_size: int = 8,
+):
+    """
+    Extract, execute and validate module tests in a single pipeline.
+
+    Frames are handed to the runner as soon as they are written, and each
+    output is validated as soon as it is produced. Stages are connected by
+    bounded queues so a slow stage applies back-pressure to its producers.
+    Runners that cannot execute frames one at a time start once extraction
+    has finished, while validation still overlaps with the rest of the work.
+
+    Parameters
+    ----------
+    record_path : Path
+        Path to the scenario record file.
+    frames_dir : Path
+        Directory to store extracted frames.
+    outputs_dir : Path
+        Directory to store execution outputs.
+    runner : DeFTRunner
+        Backend used to execute module tests.
+    queue_size : int
+        Maximum number of frames buffered between two stages.
+    """
+    stop = threading.Event()
+    extracted: Queue = Queue(maxsize=queue_size)
+    executed: Queue = Queue(maxsize=queue_size)
+    reproduce_errors = []
+
+    def extract():
+        agent = DeFTLog(CONFIG.APOLLO_ROOT)
+        print('Extracting frames ...')
+        frames = agent.extract_frames(str(record_path))
+        if frames_dir.exists():
+            shutil.rmtree(frames_dir)
+        print(f'Streaming {len(frames)} frames...')
+        for index, frame in enumerate(frames):
+            frame_dir = agent.write_frame_to_file(index, frame, frames_dir)
+            _put(extracted, (index, frame_dir), stop)
+
+    def execute():
+        if runner.supports_streaming():
+            runner.prepare(outputs_dir)
+            for index, frame_dir in _drain(extracted, stop):
+                output_dir = runner.run_frame(frame_dir, outputs_dir, index)
+                _put(executed, output_dir, stop)
+            return
+        for _ in _drain(extracted, stop):
+            pass
+        runner.run(frames_dir, outputs_dir)
+        index = 0
+        while Path(outputs_dir, str(index), 'deft.bin').exists():
+            _put(executed, Path(outputs_dir, str(index)), stop)
+            index += 1
+
+    def validate():
+        for output_dir in _drain(executed, stop):
+            reproduce_errors.append(verify_frame(output_dir))
+
+    stages = [
+        _Stage('extract', extract, stop, extracted),
+        _Stage('execute', execute, stop, executed),
+        _Stage('validate', validate, stop),
+    ]
+    for stage in stages:
+        stage.start()
+
+    for stage in stages:
+        stage.join()
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
+
+    print(f'Outputs saved to {outputs_dir}')
+    print_summary(reproduce_errors)
+
+
+def main(parser):
+    parser.add_argument(
+        'record',
+        help='Path to scenario record file',
+    )
+
+    parser.add_argument(
+        '--frames-dir',
+        default='out/testdata',
+        help='Directory to store extracted frames',
+    )
+
+    parser.add_argument(
+        '--outputs-dir',
+        default='out/testdata_out',
+        help='Directory to store execution outputs',
+    )
+
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=8,
+        help='Maximum number of frames buffered between pipeline stages',
+    )
+
+    add_runner_arguments(parser)
+
+    def handler(args):
+        record = Path(args.record)
+
+        if not record.exists():
+            parser.error('Scenario record file does not exist')
+
+        if args.queue_size < 1:
+            parser.error('Queue size must be positive')
+
+        try:
+            runner = create_runner(args)
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(str(e))
+
+        run_pipeline(
+            record,
+            Path(args.frames_dir),
+            Path(args.outputs_dir),
+            runner,
+            args.queue_size,
+        )
+
+    parser.set_defaults(func=handler)
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+PERCENTILES = [50, 90, 95, 99]
+
+# reproduce error thresholds of the theta sweep in experiments/rq1_process.py
+THRESHOLDS = [
+    0.0,
+    0.1,
+    0.23,
+    1.62,
+    6.99,
+    17.15,
+    29.56,
+    139.51,
+    308.71,
+    1453.07,
+    2320.81,
+]
+
+# per-frame columns, in the field order of FrameResult
+FRAME_DTYPE = np.dtype(
+    [
+        ('index', np.int64),
+        ('distance', np.float64),
+        ('flags', np.int64),
+        ('sequence_num', np.int64),
+        ('timestamp', np.float64),
+    ]
+)
+
+_CSV_COLUMNS = ['index', 'sequence_num', 'timestamp', 'distance', 'flags']
+_CSV_FORMAT = ['%d', '%d', '%.17g', '%.17g', '%d']
+
+
+@dataclass
+class ValidationReport:
+    """
+    Per-frame reproduce errors of a validation and their summary statistics.
+    Frames that could not be compared (non-zero flags) are excluded from the
+    statistics.
+    """
+
+    frames: np.ndarray
+    percentiles: np.ndarray
+    percentile_values: np.ndarray
+    thresholds: np.ndarray
+    exceedances: np.ndarray
+    worst: np.ndarray
+
+    @classmethod
+    def from_results(
+        cls,
+        results: Sequence[NamedTuple],
+        thresholds: Sequence[float] = THRESHOLDS,
+        worst_k: int = 10,
+    ) -> 'ValidationReport':
+        """
+        Build a report from validation results in a single vectorized pass.
+
+        Args:
+            results (Sequence[NamedTuple]): ``FrameResult`` of all frames.
+            thresholds (Sequence[float]): Thresholds whose exceedances are counted.
+            worst_k (int): Number of frames with the largest reproduce error
+                to report.
+
+        Returns:
+            ValidationReport: The report.
+        """
+        frames = np.array([tuple(r) for r in results], dtype=FRAME_DTYPE)
+        distances = frames['distance'][frames['flags'] == 0]
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+
+        if len(distances) > 0:
+            percentile_values = np.percentile(distances, PERCENTILES)
+        else:
+            percentile_values = np.full(len(PERCENTILES), np.nan)
+        exceedances = (distances[:, None] > thresholds[None, :]).sum(axis=0)
+
+        valid = np.flatnonzero(frames['flags'] == 0)
+        order = np.argsort(-distances, kind='stable')[:worst_k]
+        return cls(
+            frames=frames,
+            percentiles=np.array(PERCENTILES),
+            percentile_values=percentile_values,
+            thresholds=thresholds,
+            exceedances=exceedances,
+            worst=frames['index'][valid[order]],
+        )
+
+    def write(self, report_dir: Path):
+        """
+        Write the per-frame columns to ``report.csv``, and the columns with
+        the summary statistics to ``report.npz``.
+
+        Args:
+            report_dir (Path): The directory to write to.
+        """
+        report_dir = Path(report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        np.savetxt(
+            report_dir / 'report.csv',
+            np.column_stack([self.frames[c].astype(object) for c in _CSV_COLUMNS]),
+            fmt=_CSV_FORMAT,
+            delimiter=',',
+            header=','.join(_CSV_COLUMNS),
+            comments='',
+        )
+        np.savez_compressed(
+            report_dir / 'report.npz',
+            **{c: self.frames[c] for c in FRAME_DTYPE.names},
+            percentiles=self.percentiles,
+            percentile_values=self.percentile_values,
+            thresholds=self.thresholds,
+            exceedances=self.exceedances,
+            worst=self.worst,
+        )
+
+    def print(self):
+        """
+        Print the summary statistics.
+        """
+        for q, value in zip(self.percentiles, self.percentile_values):
+            print(f'P{q} reproduce error: {value}')
+        for threshold, count in zip(self.thresholds, self.exceedances):
+            print(f'Frames with reproduce error above {threshold}: {count}')
+        print('Frames with the largest reproduce error:', self.worst.tolist())
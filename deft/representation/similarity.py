@@ -0,0 +1,188 @@
+from functools import partial
+from typing import Callable, Dict, Sequence
+
+import numpy as np
+
+from deft.representation.trajectory import T, Trajectory, V, X, Y, euclidean_distance
+
+# point features compared by the shape-based metrics
+FEATURES = {
+    'xy': (X, Y),
+    'xyvt': (X, Y, V, T),
+}
+
+
+def trajectory_features(trajectory: Trajectory, columns: Sequence[int]) -> np.ndarray:
+    """
+    Select point features of a trajectory. Time is taken relative to the
+    first point, so trajectories planned at different times are comparable.
+
+    Args:
+        trajectory (Trajectory): The trajectory.
+        columns (Sequence[int]): The columns of the trajectory to select.
+
+    Returns:
+        np.ndarray: An array of shape (N, len(columns)).
+    """
+    features = trajectory.points[:, list(columns)]
+    if T in columns and len(features) > 0:
+        t = list(columns).index(T)
+        features[:, t] -= features[0, t]
+    return features
+
+
+def pairwise_distances(lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """
+    Compute the Euclidean distances between all pairs of points.
+
+    Args:
+        lhs (np.ndarray): Points of shape (N, D).
+        rhs (np.ndarray): Points of shape (M, D).
+
+    Returns:
+        np.ndarray: Distances of shape (N, M).
+    """
+    return np.sqrt(((lhs[:, None, :] - rhs[None, :, :]) ** 2).sum(axis=2))
+
+
+def _accumulate(
+    costs: np.ndarray,
+    combine: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    window: int = None,
+) -> float:
+    """
+    Evaluate a dynamic program over a cost matrix one anti-diagonal at a
+    time, where every cell combines its cost with the smallest accumulated
+    value of its left, lower and lower-left neighbours.
+
+    Args:
+        costs (np.ndarray): Cost matrix of shape (N, M).
+        combine (Callable[[np.ndarray, np.ndarray], np.ndarray]): Combines the
+            costs of cells with the accumulated values of their predecessors.
+        window (int): Sakoe-Chiba band width; cells with ``|i - j|`` beyond
+            it are not visited. It is widened to ``|N - M|`` so that the last
+            cell is reachable.
+
+    Returns:
+        float: The accumulated value of the last cell.
+    """
+    n, m = costs.shape
+    if window is not None:
+        window = max(window, abs(n - m))
+
+    # accumulated values are stored by anti-diagonal, acc[i + j, i], so that
+    # the predecessors of each anti-diagonal are contiguous slices
+    acc = np.full((n + m + 1, n + 1), np.inf)
+    acc[0, 0] = 0.0
+    skewed = np.empty_like(acc)
+    i, j = np.indices((n, m))
+    skewed[i + j + 2, i + 1] = costs
+
+    for k in range(2, n + m + 1):
+        lo, hi = max(1, k - m), min(n, k - 1)
+        if window is not None:
+            # |i - j| <= window, with j = k - i
+            lo, hi = max(lo, (k - window + 1) // 2), min(hi, (k + window) // 2)
+        previous = np.minimum(
+            np.minimum(acc[k - 1, lo - 1 : hi], acc[k - 1, lo : hi + 1]),
+            acc[k - 2, lo - 1 : hi],
+        )
+        acc[k, lo : hi + 1] = combine(skewed[k, lo : hi + 1], previous)
+    return float(acc[n + m, n])
+
+
+def discrete_frechet_distance(
+    lhs: Trajectory, rhs: Trajectory, columns: Sequence[int] = FEATURES['xy']
+) -> float:
+    """
+    Compute the discrete Fréchet distance between two trajectories.
+
+    Args:
+        lhs (Trajectory): The first trajectory.
+        rhs (Trajectory): The second trajectory.
+        columns (Sequence[int]): The point features to compare.
+
+    Returns:
+        float: The discrete Fréchet distance between the two trajectories.
+    """
+    costs = pairwise_distances(
+        trajectory_features(lhs, columns), trajectory_features(rhs, columns)
+    )
+    return _accumulate(costs, np.maximum)
+
+
+def hausdorff_distance(
+    lhs: Trajectory, rhs: Trajectory, columns: Sequence[int] = FEATURES['xy']
+) -> float:
+    """
+    Compute the Hausdorff distance between the points of two trajectories.
+
+    Args:
+        lhs (Trajectory): The first trajectory.
+        rhs (Trajectory): The second trajectory.
+        columns (Sequence[int]): The point features to compare.
+
+    Returns:
+        float: The Hausdorff distance between the two trajectories.
+    """
+    costs = pairwise_distances(
+        trajectory_features(lhs, columns), trajectory_features(rhs, columns)
+    )
+    return float(max(costs.min(axis=1).max(), costs.min(axis=0).max()))
+
+
+def dtw_distance(
+    lhs: Trajectory,
+    rhs: Trajectory,
+    columns: Sequence[int] = FEATURES['xy'],
+    window: int = 10,
+) -> float:
+    """
+    Compute the dynamic time warping distance between two trajectories.
+
+    Args:
+        lhs (Trajectory): The first trajectory.
+        rhs (Trajectory): The second trajectory.
+        columns (Sequence[int]): The point features to compare.
+        window (int): Width of the Sakoe-Chiba band, in points. None disables
+            the band.
+
+    Returns:
+        float: The dynamic time warping distance between the two trajectories.
+    """
+    costs = pairwise_distances(
+        trajectory_features(lhs, columns), trajectory_features(rhs, columns)
+    )
+    return _accumulate(costs, np.add, window)
+
+
+METRICS: Dict[str, Callable[..., float]] = {
+    'euclidean': euclidean_distance,
+    'frechet': discrete_frechet_distance,
+    'hausdorff': hausdorff_distance,
+    'dtw': dtw_distance,
+}
+
+
+def get_metric(
+    name: str, features: str = 'xy', window: int = 10
+) -> Callable[[Trajectory, Trajectory], float]:
+    """
+    Get a trajectory metric by name.
+
+    Args:
+        name (str): The name of the metric, a key of ``METRICS``.
+        features (str): The point features compared by shape-based metrics,
+            a key of ``FEATURES``.
+        window (int): Width of the Sakoe-Chiba band of the DTW metric.
+
+    Returns:
+        Callable[[Trajectory, Trajectory], float]: The metric.
+    """
+    if name not in METRICS:
+        raise ValueError(f'Unknown metric: {name}')
+    if name == 'euclidean':
+        return euclidean_distance
+    if name == 'dtw':
+        return partial(dtw_distance, columns=FEATURES[features], window=window)
+    return partial(METRICS[name], columns=FEATURES[features])
@@ -1,8 +1,12 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
-from typing import List
+from typing import Iterable, Iterator, List, Tuple, Union
 
 import numpy as np
 
+# columns of padded trajectory arrays, in the field order of PathPoint
+X, Y, V, A, T = range(5)
+
 
 @dataclass
 class PathPoint:
@@ -79,16 +83,97 @@ class PathPoint:
         )
 
 
-@dataclass
+class PathPointsView(Sequence):
+    """
+    Read-only view of the points of a trajectory as PathPoint objects.
+
+    PathPoint objects are created on access, so modifying them does not
+    modify the trajectory.
+    """
+
+    def __init__(self, points: np.ndarray):
+        self._points = points
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [PathPoint(*row) for row in self._points[index].tolist()]
+        return PathPoint(*self._points[index].tolist())
+
+    def __iter__(self) -> Iterator[PathPoint]:
+        for row in self._points.tolist():
+            yield PathPoint(*row)
+
+
 class Trajectory:
-    path_points: List[PathPoint]
+    """
+    A trajectory stored as an (N, 5) float64 array with the x, y, v, a and t
+    columns of its points.
+    """
+
+    def __init__(self, points: Union[np.ndarray, Iterable[PathPoint]] = ()):
+        """
+        Initialize the Trajectory.
+
+        Args:
+            points (Union[np.ndarray, Iterable[PathPoint]]): An (N, 5) array of
+                x, y, v, a and t, or PathPoint objects.
+        """
+        if isinstance(points, np.ndarray):
+            self.points = np.asarray(points, dtype=np.float64).reshape(-1, 5)
+        else:
+            self.points = np.array(
+                [(pp.x, pp.y, pp.v, pp.a, pp.t) for pp in points], dtype=np.float64
+            ).reshape(-1, 5)
+
+    @classmethod
+    def from_planning_message(cls, msg) -> 'Trajectory':
+        """
+        Build a trajectory from the trajectory points of a planning message.
+
+        Args:
+            msg (ADCTrajectory): The planning message.
+
+        Returns:
+            Trajectory: The planned trajectory, timed by the message header.
+        """
+        points = np.fromiter(
+            (
+                (tp.path_point.x, tp.path_point.y, tp.v, tp.a, tp.relative_time)
+                for tp in msg.trajectory_point
+            ),
+            dtype=np.dtype((np.float64, 5)),
+            count=len(msg.trajectory_point),
+        )
+        points[:, T] += msg.header.timestamp_sec
+        return cls(points)
+
+    @property
+    def path_points(self) -> PathPointsView:
+        return PathPointsView(self.points)
+
+    @path_points.setter
+    def path_points(self, path_points: Iterable[PathPoint]):
+        self.points = Trajectory(path_points).points
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Trajectory):
+            return NotImplemented
+        return np.array_equal(self.points, other.points)
+
+    def __repr__(self) -> str:
+        return f'Trajectory({len(self.points)} points)'
 
     def align(self, t: float):
         """
         Align the trajectory by adjusting the time of each path point.
         """
-        for pp in self.path_points:
-            pp.t -= t
+        self.points[:, T] -= t
 
     def displacement(self):
         """
@@ -97,9 +182,10 @@ class Trajectory:
         Returns:
             float: The displacement of the trajectory.
         """
-        if len(self.path_points) == 0:
+        if len(self.points) == 0:
             return 0.0
-        return self.path_points[-1].distance_error(self.path_points[0])
+        dx, dy = self.points[-1, [X, Y]] - self.points[0, [X, Y]]
+        return np.sqrt(dx**2 + dy**2)
 
     def length(self):
         """
@@ -108,15 +194,8 @@ class Trajectory:
         Returns:
             float: The length of the trajectory.
         """
-        total_distance = 0
-        for i in range(1, len(self.path_points)):
-            prev_x = self.path_points[i - 1].x
-            prev_y = self.path_points[i - 1].y
-            curr_x = self.path_points[i].x
-            curr_y = self.path_points[i].y
-            traversed = np.sqrt((prev_x - curr_x) ** 2 + (prev_y - curr_y) ** 2)
-            total_distance += traversed
-        return total_distance
+        deltas = np.diff(self.points[:, [X, Y]], axis=0)
+        return float(np.sqrt((deltas**2).sum(axis=1)).sum())
 
 
 def eq_traj(x: Trajectory, y: Trajectory, threshold=0.0, compare_time=True) -> bool:
@@ -132,23 +211,11 @@ def eq_traj(x: Trajectory, y: Trajectory, threshold=0.0, compare_time=True) -> b
     Returns:
         bool: True if the trajectories are equivalent, False otherwise.
     """
-    if len(x.path_points) != len(y.path_points):
+    if len(x.points) != len(y.points):
         return False
-    for i in range(len(x.path_points)):
-        lhs = x.path_points[i]
-        rhs = y.path_points[i]
-        if abs(lhs.x - rhs.x) > threshold:
-            return False
-        if abs(lhs.y - rhs.y) > threshold:
-            return False
-        if abs(lhs.v - rhs.v) > threshold:
-            return False
-        if abs(lhs.a - rhs.a) > threshold:
-            return False
-        if compare_time:
-            if abs(lhs.t - rhs.t) > threshold:
-                return False
-    return True
+    columns = [X, Y, V, A, T] if compare_time else [X, Y, V, A]
+    errors = np.abs(x.points[:, columns] - y.points[:, columns])
+    return not (errors > threshold).any()
 
 
 def euclidean_distance(lhs: Trajectory, rhs: Trajectory, num_data_points=10):
@@ -163,18 +230,18 @@ def euclidean_distance(lhs: Trajectory, rhs: Trajectory, num_data_points=10):
     Returns:
         float: The Euclidean distance between the two trajectories.
     """
-    lhs_start_t = lhs.path_points[0].t
-    lhs_ts = [x.t for x in lhs.path_points]
-    lhs_xs = [x.x for x in lhs.path_points]
-    lhs_ys = [x.y for x in lhs.path_points]
+    lhs_ts = lhs.points[:, T]
+    lhs_xs = lhs.points[:, X]
+    lhs_ys = lhs.points[:, Y]
+    lhs_start_t = lhs_ts[0]
 
-    rhs_start_t = rhs.path_points[0].t
-    rhs_ts = [x.t for x in rhs.path_points]
-    rhs_xs = [x.x for x in rhs.path_points]
-    rhs_ys = [x.y for x in rhs.path_points]
+    rhs_ts = rhs.points[:, T]
+    rhs_xs = rhs.points[:, X]
+    rhs_ys = rhs.points[:, Y]
+    rhs_start_t = rhs_ts[0]
 
-    lhs_duration = lhs.path_points[-1].t - lhs.path_points[0].t
-    rhs_duration = rhs.path_points[-1].t - rhs.path_points[0].t
+    lhs_duration = lhs_ts[-1] - lhs_start_t
+    rhs_duration = rhs_ts[-1] - rhs_start_t
 
     min_duration = int(min(lhs_duration, rhs_duration))
 
@@ -186,7 +253,155 @@ def euclidean_distance(lhs: Trajectory, rhs: Trajectory, num_data_points=10):
 
         rhs_x = np.interp(t + rhs_start_t, rhs_ts, rhs_xs)
         rhs_y = np.interp(t + rhs_start_t, rhs_ts, rhs_ys)
-        distance = (lhs_x - rhs_x) ** 2 + (lhs_y - rhs_y) ** 2
+        # squared by multiplication, which np.square matches exactly in
+        # batch_euclidean_distance, unlike pow
+        dx = lhs_x - rhs_x
+        dy = lhs_y - rhs_y
+        distance = dx * dx + dy * dy
         total_distance += distance
 
     return np.sqrt(total_distance)
+
+
+def pad_trajectories(trajectories: List[Trajectory]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack trajectories of different lengths into a padded array.
+
+    Args:
+        trajectories (List[Trajectory]): The trajectories to stack.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: An array of shape (F, P, 5) holding the
+            x, y, v, a and t columns of every trajectory, padded with NaN to
+            the longest trajectory, and the number of points of each trajectory.
+    """
+    lengths = np.array([len(t.points) for t in trajectories], dtype=np.intp)
+    padded = np.full((len(trajectories), lengths.max(initial=0), 5), np.nan)
+    for i, trajectory in enumerate(trajectories):
+        padded[i, : lengths[i]] = trajectory.points
+    return padded, lengths
+
+
+def _batch_interp(
+    queries: np.ndarray,
+    xp: np.ndarray,
+    fp: np.ndarray,
+    lengths: np.ndarray,
+    chunk_size: int,
+) -> np.ndarray:
+    """
+    Evaluate ``np.interp`` row by row over padded arrays.
+
+    Follows the rules of the NumPy implementation so that every value is
+    identical to a call of ``np.interp(queries[i, k], xp[i], fp[i])`` on the
+    unpadded rows, given that the sample points of each row are sorted.
+
+    Args:
+        queries (np.ndarray): Query points of shape (F, Q).
+        xp (np.ndarray): Sample points of shape (F, P), padded with NaN.
+        fp (np.ndarray): Sample values of shape (F, P).
+        lengths (np.ndarray): Number of valid samples of each row.
+        chunk_size (int): Number of rows searched at once.
+
+    Returns:
+        np.ndarray: Interpolated values of shape (F, Q).
+    """
+    # index of the last sample not greater than the query; padding never
+    # compares true, and a query beyond the last sample maps to the last one
+    j = np.empty(queries.shape, dtype=np.intp)
+    for start in range(0, len(queries), chunk_size):
+        rows = slice(start, start + chunk_size)
+        j[rows] = (xp[rows, None, :] <= queries[rows, :, None]).sum(axis=2) - 1
+
+    rows = np.arange(len(queries))[:, None]
+    last = lengths[:, None] - 1
+    lo = np.maximum(j, 0)
+    hi = np.minimum(lo + 1, last)
+    x_lo, x_hi = xp[rows, lo], xp[rows, hi]
+    f_lo, f_hi = fp[rows, lo], fp[rows, hi]
+
+    with np.errstate(all='ignore'):
+        slope = (f_hi - f_lo) / (x_hi - x_lo)
+        result = slope * (queries - x_lo) + f_lo
+        # if we get nan in one direction, try the other
+        result = np.where(np.isnan(result), slope * (queries - x_hi) + f_hi, result)
+    result = np.where(np.isnan(result) & (f_lo == f_hi), f_lo, result)
+
+    return np.select(
+        [
+            np.isnan(queries) & (last > 0),
+            j == -1,
+            j == last,
+            x_lo == queries,
+        ],
+        [queries, fp[:, :1], fp[rows, last], f_lo],
+        result,
+    )
+
+
+def batch_euclidean_distance(
+    lhs: np.ndarray,
+    lhs_lengths: np.ndarray,
+    rhs: np.ndarray,
+    rhs_lengths: np.ndarray,
+    num_data_points=10,
+    chunk_size=1024,
+) -> np.ndarray:
+    """
+    Compute the Euclidean distance between pairs of trajectories at once.
+
+    The result of every pair is identical to ``euclidean_distance`` of the
+    corresponding trajectories.
+
+    Args:
+        lhs (np.ndarray): The first trajectories, as returned by
+            ``pad_trajectories``.
+        lhs_lengths (np.ndarray): The number of points of the first trajectories.
+        rhs (np.ndarray): The second trajectories, as returned by
+            ``pad_trajectories``.
+        rhs_lengths (np.ndarray): The number of points of the second trajectories.
+        num_data_points (int): The number of data points to use for interpolation.
+        chunk_size (int): The number of trajectories interpolated at once,
+            bounding memory usage.
+
+    Returns:
+        np.ndarray: The Euclidean distance between each pair of trajectories.
+    """
+    lhs_lengths = np.asarray(lhs_lengths, dtype=np.intp)
+    rhs_lengths = np.asarray(rhs_lengths, dtype=np.intp)
+    if len(lhs) != len(rhs):
+        raise ValueError('Number of trajectories does not match')
+    if len(lhs) == 0:
+        return np.empty(0)
+    if (lhs_lengths == 0).any() or (rhs_lengths == 0).any():
+        raise ValueError('Trajectories must not be empty')
+
+    rows = np.arange(len(lhs))
+    lhs_start_t = lhs[:, 0, T]
+    rhs_start_t = rhs[:, 0, T]
+    lhs_duration = lhs[rows, lhs_lengths - 1, T] - lhs_start_t
+    rhs_duration = rhs[rows, rhs_lengths - 1, T] - rhs_start_t
+
+    # same as np.linspace(0, int(min_duration), num=num_data_points) per row
+    min_duration = np.trunc(np.minimum(lhs_duration, rhs_duration)) + 0.0
+    steps = np.arange(num_data_points, dtype=np.float64)
+    if num_data_points > 1:
+        time_points = steps * (min_duration / (num_data_points - 1))[:, None]
+        time_points[:, -1] = min_duration
+    else:
+        time_points = steps * min_duration[:, None]
+
+    lhs_ts = time_points + lhs_start_t[:, None]
+    rhs_ts = time_points + rhs_start_t[:, None]
+    lhs_xs = _batch_interp(lhs_ts, lhs[:, :, T], lhs[:, :, X], lhs_lengths, chunk_size)
+    lhs_ys = _batch_interp(lhs_ts, lhs[:, :, T], lhs[:, :, Y], lhs_lengths, chunk_size)
+    rhs_xs = _batch_interp(rhs_ts, rhs[:, :, T], rhs[:, :, X], rhs_lengths, chunk_size)
+    rhs_ys = _batch_interp(rhs_ts, rhs[:, :, T], rhs[:, :, Y], rhs_lengths, chunk_size)
+
+    # accumulate in the same order as euclidean_distance
+    dx2 = np.square(lhs_xs - rhs_xs)
+    dy2 = np.square(lhs_ys - rhs_ys)
+    total_distance = np.zeros(len(lhs))
+    for k in range(num_data_points):
+        total_distance += dx2[:, k] + dy2[:, k]
+    return np.sqrt(total_distance)
@@ -0,0 +1,278 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from deft.representation.trajectory import (
+    Trajectory,
+    batch_euclidean_distance,
+    pad_trajectories,
+)
+from deft.utils import get_planning_messages
+
+
+class PlanningRecord(NamedTuple):
+    """
+    Planning trajectories of a scenario record, one frame per planning
+    message.
+    """
+
+    # header timestamp of every frame
+    timestamps: np.ndarray
+    # trajectories as returned by pad_trajectories
+    trajectories: np.ndarray
+    lengths: np.ndarray
+
+
+def load_planning_record(record_path: Path) -> PlanningRecord:
+    """
+    Load the planning trajectories of a record. Planning messages before
+    the planning module is ready are skipped.
+
+    Args:
+        record_path (Path): The scenario record.
+
+    Returns:
+        PlanningRecord: The planning trajectories.
+    """
+    messages = get_planning_messages(str(record_path))
+    timestamps = np.array([m.header.timestamp_sec for m in messages], dtype=np.float64)
+    trajectories, lengths = pad_trajectories(
+        [Trajectory.from_planning_message(m) for m in messages]
+    )
+    return PlanningRecord(timestamps, trajectories, lengths)
+
+
+def load_planning_records(
+    record_paths: List[Path], workers: int = 1
+) -> List[PlanningRecord]:
+    """
+    Load the planning trajectories of several records.
+
+    Args:
+        record_paths (List[Path]): The scenario records.
+        workers (int): Number of worker processes loading records.
+
+    Returns:
+        List[PlanningRecord]: The planning trajectories of every record.
+    """
+    if workers <= 1 or len(record_paths) <= 1:
+        return [load_planning_record(p) for p in record_paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(load_planning_record, record_paths))
+
+
+def align_frames(
+    reference: np.ndarray,
+    timestamps: np.ndarray,
+    tolerance: float = 0.05,
+    relative: bool = True,
+) -> np.ndarray:
+    """
+    Match every reference frame with the frame of another record that has
+    the nearest planning timestamp.
+
+    Args:
+        reference (np.ndarray): Timestamps of the reference frames.
+        timestamps (np.ndarray): Timestamps of the frames to match, ascending.
+        tolerance (float): Largest timestamp difference of matched frames,
+            in seconds.
+        relative (bool): Whether timestamps are measured from the first
+            frame of each record, for records simulated at different times.
+
+    Returns:
+        np.ndarray: For every reference frame, the index of the matched
+            frame, or -1 if no frame is within the tolerance.
+    """
+    if len(reference) == 0 or len(timestamps) == 0:
+        return np.full(len(reference), -1, dtype=np.intp)
+    if relative:
+        reference = reference - reference[0]
+        timestamps = timestamps - timestamps[0]
+
+    right = np.clip(np.searchsorted(timestamps, reference), 1, len(timestamps) - 1)
+    left = right - 1
+    if len(timestamps) == 1:
+        left = right = np.zeros(len(reference), dtype=np.intp)
+    nearest = np.where(
+        np.abs(timestamps[left] - reference) <= np.abs(timestamps[right] - reference),
+        left,
+        right,
+    )
+    matched = np.abs(timestamps[nearest] - reference) <= tolerance
+    return np.where(matched, nearest, -1)
+
+
+def comparison_matrix(
+    reference: PlanningRecord,
+    reruns: List[PlanningRecord],
+    tolerance: float = 0.05,
+    relative: bool = True,
+    num_data_points: int = 10,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compare the planning trajectories of reruns with those of a reference
+    record frame by frame, in a single vectorized pass.
+
+    Args:
+        reference (PlanningRecord): The reference record.
+        reruns (List[PlanningRecord]): The rerun records.
+        tolerance (float): Largest timestamp difference of aligned frames,
+            in seconds.
+        relative (bool): Whether frames are aligned by the time since the
+            first frame of each record rather than by absolute timestamps.
+        num_data_points (int): The number of data points to use for
+            interpolation.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The distance between every rerun and
+            every reference frame, of shape (M, F), and the index of the
+            aligned rerun frame. Frames without an aligned frame, or where
+            either trajectory is empty, have distance NaN.
+    """
+    aligned = np.stack(
+        [
+            align_frames(reference.timestamps, r.timestamps, tolerance, relative)
+            for r in reruns
+        ]
+    )
+
+    # compared pairs, as (rerun, reference frame) coordinates; unaligned
+    # frames (-1) index the zero length appended to the rerun lengths
+    rerun_lengths = np.stack(
+        [np.append(r.lengths, 0)[a] for r, a in zip(reruns, aligned)]
+    )
+    runs, frames = np.nonzero((rerun_lengths > 0) & (reference.lengths > 0))
+
+    width = max(r.trajectories.shape[1] for r in reruns)
+    rhs = np.full((len(runs), width, 5), np.nan)
+    rhs_lengths = np.empty(len(runs), dtype=np.intp)
+    for m, rerun in enumerate(reruns):
+        selected = runs == m
+        rows = aligned[m, frames[selected]]
+        rhs[selected, : rerun.trajectories.shape[1]] = rerun.trajectories[rows]
+        rhs_lengths[selected] = rerun.lengths[rows]
+
+    distances = np.full(aligned.shape, np.nan)
+    distances[runs, frames] = batch_euclidean_distance(
+        reference.trajectories[frames],
+        reference.lengths[frames],
+        rhs,
+        rhs_lengths,
+        num_data_points,
+    )
+    return distances, aligned
+
+
+def run_compare_reruns(
+    reference_path: Path,
+    rerun_paths: List[Path],
+    output: Path,
+    tolerance: float = 0.05,
+    relative: bool = True,
+    workers: int = 1,
+) -> np.ndarray:
+    """
+    Compare rerun records with a reference record and save the distance
+    matrix.
+
+    Args:
+        reference_path (Path): The reference record.
+        rerun_paths (List[Path]): The rerun records.
+        output (Path): The ``.npz`` file to write.
+        tolerance (float): Largest timestamp difference of aligned frames,
+            in seconds.
+        relative (bool): Whether frames are aligned by the time since the
+            first frame of each record.
+        workers (int): Number of worker processes loading records.
+
+    Returns:
+        np.ndarray: The distance matrix of shape (M, F).
+    """
+    print('Loading planning trajectories...')
+    reference, *reruns = load_planning_records([reference_path, *rerun_paths], workers)
+
+    print('Comparing trajectories...')
+    distances, aligned = comparison_matrix(reference, reruns, tolerance, relative)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        output,
+        distances=distances,
+        aligned=aligned,
+        reference_timestamps=reference.timestamps,
+        reference=str(reference_path),
+        reruns=np.array([str(p) for p in rerun_paths]),
+    )
+
+    for path, row in zip(rerun_paths, distances):
+        compared = row[~np.isnan(row)]
+        if len(compared) == 0:
+            print(f'{path}: no aligned frames')
+            continue
+        print(
+            f'{path}: {len(compared)}/{len(row)} frames, '
+            f'max distance {compared.max()}, avg distance {compared.mean()}'
+        )
+    print(f'Distance matrix saved to {output}')
+    return distances
+
+
+def main(parser):
+    parser.add_argument(
+        'reference',
+        help='Path to the reference scenario record',
+    )
+
+    parser.add_argument(
+        'reruns',
+        nargs='+',
+        help='Paths to the rerun scenario records',
+    )
+
+    parser.add_argument(
+        '--output',
+        default='out/reruns.npz',
+        help='File to write the distance matrix to',
+    )
+
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.05,
+        help='Largest planning timestamp difference of aligned frames, in seconds',
+    )
+
+    parser.add_argument(
+        '--absolute-time',
+        action='store_true',
+        help='Align frames by absolute timestamps, not time since the first frame',
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of worker processes loading records',
+    )
+
+    def handler(args):
+        records = [Path(args.reference), *map(Path, args.reruns)]
+        for record in records:
+            if not record.exists():
+                parser.error(f'Scenario record file does not exist: {record}')
+
+        if args.workers < 1:
+            parser.error('Number of workers must be positive')
+
+        run_compare_reruns(
+            records[0],
+            records[1:],
+            Path(args.output),
+            args.tolerance,
+            not args.absolute_time,
+            args.workers,
+        )
+
+    parser.set_defaults(func=handler)
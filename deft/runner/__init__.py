@@ -0,0 +1,38 @@
+from deft.runner.base import (
+    ABORT_SENTINEL,
+    COMPLETION_MARKER,
+    START_MARKER,
+    DeFTRunner,
+    read_marker,
+    start_run,
+    write_marker,
+)
+from deft.runner.docker_runner import DockerRunner
+from deft.runner.local_runner import LocalRunner
+from deft.runner.planners import (
+    PLANNERS,
+    EchoPlanner,
+    PerturbPlanner,
+    PlannerStandIn,
+    load_planner,
+)
+
+RUNNERS = {r.get_name(): r for r in [DockerRunner, LocalRunner]}
+
+__all__ = [
+    'ABORT_SENTINEL',
+    'COMPLETION_MARKER',
+    'START_MARKER',
+    'DeFTRunner',
+    'DockerRunner',
+    'LocalRunner',
+    'PlannerStandIn',
+    'EchoPlanner',
+    'PerturbPlanner',
+    'PLANNERS',
+    'RUNNERS',
+    'load_planner',
+    'read_marker',
+    'start_run',
+    'write_marker',
+]
@@ -0,0 +1,139 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+from deft.runner.metrics import ExecutionMetrics
+
+# written to the outputs directory to stop a running execution
+ABORT_SENTINEL = 'deft.abort'
+
+# written to the outputs directory, with the id of the run, once it is cleared
+START_MARKER = 'deft.start'
+
+# written to the outputs directory, with the id of the run, once all frames
+# are executed
+COMPLETION_MARKER = 'deft.done'
+
+
+def write_marker(path: Path, run_id: str):
+    """
+    Atomically write a marker holding the id of a run.
+
+    Args:
+        path (Path): The marker file.
+        run_id (str): The id of the run.
+    """
+    tmp = path.with_name(f'{path.name}.tmp')
+    tmp.write_text(run_id)
+    os.replace(tmp, path)
+
+
+def read_marker(path: Path) -> Tuple[Optional[str], float]:
+    """
+    Read a marker written by ``write_marker``.
+
+    Args:
+        path (Path): The marker file.
+
+    Returns:
+        Tuple[Optional[str], float]: The id of the run and the modification
+        time of the marker, or None and NaN if there is no marker.
+    """
+    try:
+        return path.read_text().strip(), path.stat().st_mtime
+    except FileNotFoundError:
+        return None, float('nan')
+
+
+def start_run(outputs_dir: Path) -> str:
+    """
+    Clear the outputs directory and mark the start of a new run.
+
+    Args:
+        outputs_dir (Path): The directory to store the execution outputs.
+
+    Returns:
+        str: The id of the new run.
+    """
+    if outputs_dir.is_symlink():
+        outputs_dir.unlink()
+    elif outputs_dir.exists():
+        shutil.rmtree(outputs_dir)
+    outputs_dir.mkdir(parents=True)
+    run_id = uuid.uuid4().hex
+    write_marker(outputs_dir / START_MARKER, run_id)
+    return run_id
+
+
+class DeFTRunner:
+    """
+    Base class for backends that execute extracted module tests.
+
+    A runner takes a directory of extracted frames (``{index}/*.bin``) and
+    produces an output directory with the same layout, where every frame
+    additionally contains the reproduced planning output ``deft.bin``.
+
+    Runners that write outputs while executing replace ``deft.bin`` atomically,
+    stop before the next frame once ``ABORT_SENTINEL`` appears in the outputs
+    directory, and write ``COMPLETION_MARKER`` there when they are done.
+    Runners mark the start of a run with ``start_run``, and both markers hold
+    the id of the run, so that outputs of a previous run are never mistaken
+    for those of the current one.
+    """
+
+    @staticmethod
+    def get_name() -> str:
+        raise NotImplementedError
+
+    def run(self, frames_dir: Path, outputs_dir: Path) -> ExecutionMetrics:
+        """
+        Execute the module tests under ``frames_dir``.
+
+        Args:
+            frames_dir (Path): The directory containing the extracted frames.
+            outputs_dir (Path): The directory to store the execution outputs.
+
+        Returns:
+            ExecutionMetrics: Timing information reported by the runner.
+        """
+        raise NotImplementedError
+
+    def cleanup(self):
+        """
+        Release resources left behind by an interrupted ``run``.
+        """
+        pass
+
+    def supports_streaming(self) -> bool:
+        """
+        Whether frames can be executed one at a time as they are extracted.
+
+        Returns:
+            bool: True if ``prepare`` and ``run_frame`` are implemented.
+        """
+        return False
+
+    def prepare(self, outputs_dir: Path):
+        """
+        Prepare ``outputs_dir`` before frames are streamed into ``run_frame``.
+
+        Args:
+            outputs_dir (Path): The directory to store the execution outputs.
+        """
+        raise NotImplementedError
+
+    def run_frame(self, frame_dir: Path, outputs_dir: Path, index: int) -> Path:
+        """
+        Execute a single frame.
+
+        Args:
+            frame_dir (Path): The directory containing the extracted frame.
+            outputs_dir (Path): The directory to store the execution outputs.
+            index (int): The index of the frame.
+
+        Returns:
+            Path: The output directory of the frame.
+        """
+        raise NotImplementedError
@@ -0,0 +1,147 @@
+import os
+import shutil
+from pathlib import Path
+
+from config import CONFIG
+from deft.deft_container import DeFTContainer
+from deft.runner.base import (
+    COMPLETION_MARKER,
+    START_MARKER,
+    DeFTRunner,
+    start_run,
+    write_marker,
+)
+from deft.runner.metrics import ExecutionMetrics, parse_runner_output
+
+
+class DockerRunner(DeFTRunner):
+    """
+    Executes module tests inside the DeFT-Apollo container using
+    ``/apollo/modules/deft/deft.sh``.
+    """
+
+    @staticmethod
+    def get_name() -> str:
+        return 'docker'
+
+    def __init__(
+        self,
+        apollo_root: Path = CONFIG.APOLLO_ROOT,
+        user: str = 'deft',
+        container_name: str = None,
+        live_outputs: bool = False,
+    ):
+        """
+        Initialize the DockerRunner.
+
+        Args:
+            apollo_root (Path): The root directory of the Apollo installation.
+            user (str): The user to run the container as.
+            container_name (str): The name of the container. Runners executing
+                concurrently must use distinct names.
+            live_outputs (bool): Whether outputs are visible in the outputs
+                directory while the module tests are running. Test data is
+                then placed in the Apollo directory shared with the container
+                instead of being copied into the container.
+        """
+        self.apollo_root = Path(apollo_root)
+        self.user = user
+        self.container_name = container_name
+        self.live_outputs = live_outputs
+
+    def get_container(self) -> DeFTContainer:
+        """
+        Get the container used by this runner.
+
+        Returns:
+            DeFTContainer: The DeFT container.
+        """
+        return DeFTContainer(self.apollo_root, self.user, self.container_name)
+
+    def run(self, frames_dir: Path, outputs_dir: Path) -> ExecutionMetrics:
+        # outputs of the previous run, including its completion marker, are
+        # removed before the slow container start, so that a follower never
+        # validates them
+        run_id = start_run(outputs_dir)
+
+        print('Starting DeFT container...')
+        ctn = self.get_container()
+
+        if not ctn.is_running():
+            ctn.start()
+
+        assert ctn.is_running()
+
+        if self.live_outputs:
+            output = self._run_live(ctn, frames_dir, outputs_dir)
+        else:
+            print('Loading testdata into container...')
+            ctn.load_testdata(frames_dir)
+
+            print('Running DeFT tests...')
+            output = ctn.deft_run_tests()
+
+            print('Saving outputs...')
+            staged_dir = self._staging_dir(outputs_dir)
+            ctn.save_testdata(staged_dir)
+            shutil.copy2(outputs_dir / START_MARKER, staged_dir)
+            self._replace_outputs(staged_dir, outputs_dir)
+        Path(outputs_dir, 'runner.log').write_text(output)
+        # the marker written by the container does not identify the run
+        write_marker(Path(outputs_dir, COMPLETION_MARKER), run_id)
+
+        ctn.stop()
+        ctn.remove()
+
+        return parse_runner_output(output, self.get_name())
+
+    def _run_live(self, ctn: DeFTContainer, frames_dir: Path, outputs_dir: Path) -> str:
+        # /apollo inside the container is the Apollo root on the host
+        shared_dir = Path('data', 'deft', ctn.container_name, 'testdata')
+        host_dir = self.apollo_root / shared_dir
+        if host_dir.exists():
+            shutil.rmtree(host_dir)
+
+        print('Copying testdata to shared directory...')
+        shutil.copytree(frames_dir, host_dir)
+        shutil.copy2(outputs_dir / START_MARKER, host_dir)
+        shutil.rmtree(outputs_dir)
+        outputs_dir.symlink_to(host_dir.resolve(), target_is_directory=True)
+
+        print('Running DeFT tests...')
+        try:
+            output = ctn.deft_run_tests(testdata_dir=str(Path('/apollo', shared_dir)))
+        finally:
+            # the shared directory stays readable through the symlink until
+            # the complete outputs replace it
+            staged_dir = self._staging_dir(outputs_dir)
+            try:
+                shutil.copytree(host_dir, staged_dir, copy_function=os.link)
+            except OSError:
+                # hard links only work on the same filesystem
+                shutil.rmtree(staged_dir, ignore_errors=True)
+                shutil.copytree(host_dir, staged_dir)
+            self._replace_outputs(staged_dir, outputs_dir)
+            shutil.rmtree(host_dir)
+        return output
+
+    @staticmethod
+    def _staging_dir(outputs_dir: Path) -> Path:
+        # next to the outputs, so that they can be replaced by a rename
+        staged_dir = outputs_dir.with_name(f'{outputs_dir.name}.staged')
+        if staged_dir.exists():
+            shutil.rmtree(staged_dir)
+        return staged_dir
+
+    @staticmethod
+    def _replace_outputs(staged_dir: Path, outputs_dir: Path):
+        if outputs_dir.is_symlink():
+            outputs_dir.unlink()
+        else:
+            shutil.rmtree(outputs_dir)
+        os.replace(staged_dir, outputs_dir)
+
+    def cleanup(self):
+        ctn = self.get_container()
+        ctn.stop()
+        ctn.remove()
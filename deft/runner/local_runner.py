@@ -0,0 +1,90 @@
+import os
+import shutil
+import time
+from pathlib import Path
+
+from deft.runner.base import (
+    ABORT_SENTINEL,
+    COMPLETION_MARKER,
+    DeFTRunner,
+    start_run,
+    write_marker,
+)
+from deft.runner.metrics import ExecutionMetrics, FrameMetrics
+from deft.runner.planners import EchoPlanner, PlannerStandIn
+
+
+class LocalRunner(DeFTRunner):
+    """
+    Executes module tests in the local process with a planner stand-in.
+
+    Mirrors the behavior of ``cpp/deft/main.cc``: frames are processed in
+    index order until a frame without ``planning.bin`` is reached, and the
+    output of each frame is written to ``{index}/deft.bin``.
+    """
+
+    @staticmethod
+    def get_name() -> str:
+        return 'local'
+
+    def __init__(self, planner: PlannerStandIn = None):
+        """
+        Initialize the LocalRunner.
+
+        Args:
+            planner (PlannerStandIn): The planner stand-in to execute.
+        """
+        self.planner = planner if planner is not None else EchoPlanner()
+
+    def run(self, frames_dir: Path, outputs_dir: Path) -> ExecutionMetrics:
+        run_id = start_run(outputs_dir)
+
+        print('Copying testdata...')
+        shutil.copytree(frames_dir, outputs_dir, dirs_exist_ok=True)
+
+        print(f'Running DeFT tests with {self.planner.get_name()} planner...')
+        metrics = ExecutionMetrics(self.get_name(), init_time=0.0)
+        start = time.perf_counter()
+        index = 0
+        while True:
+            if Path(outputs_dir, ABORT_SENTINEL).exists():
+                print(f'Aborted at frame {index}')
+                break
+            frame_dir = Path(outputs_dir, str(index))
+            if not Path(frame_dir, 'planning.bin').exists():
+                break
+            metrics.frames.append(self._plan_frame(frame_dir, index))
+            index += 1
+        write_marker(Path(outputs_dir, COMPLETION_MARKER), run_id)
+
+        metrics.num_frames = index
+        metrics.total_time = time.perf_counter() - start
+        metrics.io_time = sum(f.io_time for f in metrics.frames)
+        metrics.planning_time = sum(f.planning_time for f in metrics.frames)
+        return metrics
+
+    def supports_streaming(self) -> bool:
+        return True
+
+    def prepare(self, outputs_dir: Path):
+        start_run(outputs_dir)
+
+    def run_frame(self, frame_dir: Path, outputs_dir: Path, index: int) -> Path:
+        output_dir = Path(outputs_dir, str(index))
+        shutil.copytree(frame_dir, output_dir)
+        self._plan_frame(output_dir, index)
+        return output_dir
+
+    def _plan_frame(self, frame_dir: Path, index: int) -> FrameMetrics:
+        # the stand-in loads its own inputs, so its whole runtime is planning
+        # time and writing the output is IO time
+        frame_start = time.perf_counter()
+        output = self.planner.plan(frame_dir, index)
+        frame_planning = time.perf_counter()
+        # deft.bin only appears once it is complete
+        Path(frame_dir, 'deft.bin.tmp').write_bytes(output)
+        os.replace(Path(frame_dir, 'deft.bin.tmp'), Path(frame_dir, 'deft.bin'))
+        frame_io = time.perf_counter()
+        return FrameMetrics(
+            index, frame_io - frame_planning, frame_planning - frame_start
+        )
@@ -0,0 +1,129 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PERCENTILES = [50, 90, 95, 99]
+
+_FRAME_PATTERN = re.compile(
+    r'^DeFT Frame (\d+) IO TIME: (\S+) seconds PLANNING TIME: (\S+) seconds$'
+)
+_SUMMARY_PATTERN = re.compile(r'^(INIT|TOTAL|IO|PLANNING) TIME: (\S+) seconds$')
+_STOPPED_PATTERN = re.compile(r'^stopped at input_seq_num: (\d+)$')
+
+
+@dataclass
+class FrameMetrics:
+    index: int
+    io_time: float
+    planning_time: float
+
+    def json(self):
+        """
+        Convert the FrameMetrics object to a JSON-serializable dictionary.
+
+        Returns:
+            A JSON-serializable dictionary representation of the FrameMetrics object.
+        """
+        return {
+            'index': self.index,
+            'io_time': self.io_time,
+            'planning_time': self.planning_time,
+        }
+
+
+@dataclass
+class ExecutionMetrics:
+    """
+    Timing of a single execution of module tests, in seconds.
+    """
+
+    runner: str
+    num_frames: int = 0
+    init_time: Optional[float] = None
+    total_time: Optional[float] = None
+    io_time: Optional[float] = None
+    planning_time: Optional[float] = None
+    wall_time: Optional[float] = None
+    frames: List[FrameMetrics] = field(default_factory=list)
+
+    def planning_latency_percentiles(self) -> Dict[str, float]:
+        """
+        Compute percentiles of the per-frame planning latency.
+
+        Returns:
+            Dict[str, float]: Percentiles keyed by ``p{q}``, empty if no
+            per-frame timing is available.
+        """
+        if len(self.frames) == 0:
+            return {}
+        latencies = np.array([f.planning_time for f in self.frames])
+        values = np.percentile(latencies, PERCENTILES)
+        result = {f'p{q}': float(v) for q, v in zip(PERCENTILES, values)}
+        result['max'] = float(latencies.max())
+        return result
+
+    def json(self):
+        """
+        Convert the ExecutionMetrics object to a JSON-serializable dictionary.
+
+        Returns:
+            A JSON-serializable dictionary representation of the object.
+        """
+        return {
+            'runner': self.runner,
+            'num_frames': self.num_frames,
+            'init_time': self.init_time,
+            'total_time': self.total_time,
+            'io_time': self.io_time,
+            'planning_time': self.planning_time,
+            'wall_time': self.wall_time,
+            'planning_latency': self.planning_latency_percentiles(),
+            'frames': [f.json() for f in self.frames],
+        }
+
+    def write(self, filename: Path):
+        """
+        Write the metrics to a JSON file.
+
+        Args:
+            filename (Path): The file to write to.
+        """
+        with open(filename, 'w') as fp:
+            json.dump(self.json(), fp, indent=2)
+
+
+def parse_runner_output(output: str, runner: str = 'docker') -> ExecutionMetrics:
+    """
+    Parse the standard output of ``cpp/deft/main.cc`` into execution metrics.
+
+    Args:
+        output (str): The captured standard output of the DeFT runner.
+        runner (str): The name of the runner that produced the output.
+
+    Returns:
+        ExecutionMetrics: The parsed metrics.
+    """
+    metrics = ExecutionMetrics(runner)
+    for line in output.splitlines():
+        line = line.strip()
+        match = _FRAME_PATTERN.match(line)
+        if match:
+            metrics.frames.append(
+                FrameMetrics(
+                    int(match.group(1)), float(match.group(2)), float(match.group(3))
+                )
+            )
+            continue
+        match = _SUMMARY_PATTERN.match(line)
+        if match:
+            name = f'{match.group(1).lower()}_time'
+            setattr(metrics, name, float(match.group(2)))
+            continue
+        match = _STOPPED_PATTERN.match(line)
+        if match:
+            metrics.num_frames = int(match.group(1))
+    return metrics
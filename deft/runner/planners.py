@@ -0,0 +1,100 @@
+import importlib
+from pathlib import Path
+
+import numpy as np
+
+from apollo_modules.modules.planning.proto.planning_pb2 import ADCTrajectory
+
+
+class PlannerStandIn:
+    """
+    Stand-in for the Apollo planning module used by the local runner.
+
+    Implementations receive a frame directory containing the extracted
+    planning inputs and the recorded ``planning.bin``, and return the
+    serialized planning output to be stored as ``deft.bin``.
+    """
+
+    @staticmethod
+    def get_name() -> str:
+        raise NotImplementedError
+
+    def plan(self, frame_dir: Path, index: int) -> bytes:
+        """
+        Produce the planning output for a frame.
+
+        Args:
+            frame_dir (Path): The directory containing the frame.
+            index (int): The index of the frame.
+
+        Returns:
+            bytes: The serialized ADCTrajectory.
+        """
+        raise NotImplementedError
+
+
+class EchoPlanner(PlannerStandIn):
+    """
+    Reproduces every frame exactly by echoing ``planning.bin``.
+    """
+
+    @staticmethod
+    def get_name() -> str:
+        return 'echo'
+
+    def plan(self, frame_dir: Path, index: int) -> bytes:
+        return Path(frame_dir, 'planning.bin').read_bytes()
+
+
+class PerturbPlanner(PlannerStandIn):
+    """
+    Adds Gaussian noise to the recorded trajectory points. The noise is
+    seeded by the frame index so repeated runs remain deterministic.
+    """
+
+    @staticmethod
+    def get_name() -> str:
+        return 'perturb'
+
+    def __init__(self, scale: float = 0.05, seed: int = 0):
+        """
+        Initialize the PerturbPlanner.
+
+        Args:
+            scale (float): Standard deviation of the positional noise in meters.
+            seed (int): Base seed of the noise generator.
+        """
+        self.scale = scale
+        self.seed = seed
+
+    def plan(self, frame_dir: Path, index: int) -> bytes:
+        msg = ADCTrajectory()
+        msg.ParseFromString(Path(frame_dir, 'planning.bin').read_bytes())
+        rng = np.random.default_rng(self.seed + index)
+        noise = rng.normal(0.0, self.scale, size=(len(msg.trajectory_point), 2))
+        for tp, (dx, dy) in zip(msg.trajectory_point, noise):
+            tp.path_point.x += float(dx)
+            tp.path_point.y += float(dy)
+        return msg.SerializeToString()
+
+
+PLANNERS = {p.get_name(): p for p in [EchoPlanner, PerturbPlanner]}
+
+
+def load_planner(spec: str) -> PlannerStandIn:
+    """
+    Load a planner stand-in by name or by ``module:ClassName``.
+
+    Args:
+        spec (str): A registered planner name or an import path.
+
+    Returns:
+        PlannerStandIn: The instantiated planner.
+    """
+    if spec in PLANNERS:
+        return PLANNERS[spec]()
+    if ':' not in spec:
+        raise ValueError(f'Unknown planner {spec}')
+    module_name, cls_name = spec.split(':', 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, cls_name)()
@@ -0,0 +1,495 @@
+import argparse
+import multiprocessing
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from deft.execute import add_runner_arguments, create_runner, run_execute
+from deft.extract import run_extract
+from deft.validate import run_verify
+
+JOB_KINDS = ['extract', 'execute', 'validate']
+
+
+class JobStatus:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    source: str
+    target: str
+    priority: int
+    failures: int
+    status: str
+    attempts: int
+    max_attempts: int
+    timeout: Optional[float]
+    error: Optional[str]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    timeout REAL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+class JobQueue:
+    """
+    Persistent job queue stored in a SQLite file.
+
+    Jobs are claimed in order of priority, then by the number of times the
+    same scenario failed before (so previously failing scenarios run first),
+    then in insertion order.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Initialize the JobQueue.
+
+        Args:
+            db_path (Path): The SQLite file backing the queue.
+        """
+        self.db_path = Path(db_path)
+        with closing(self._connect()) as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # one connection per call, so the queue can be shared across threads
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(
+        self,
+        kind: str,
+        source: str,
+        target: str = '',
+        priority: int = 0,
+        max_attempts: int = 3,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind (str): One of ``extract``, ``execute`` and ``validate``.
+            source (str): Record file, frames directory or outputs directory.
+            target (str): Frames directory or outputs directory.
+            priority (int): Jobs with higher priority are claimed first.
+            max_attempts (int): Number of attempts before the job fails.
+            timeout (float): Wall-clock timeout of one attempt in seconds.
+
+        Returns:
+            int: The id of the new job.
+        """
+        assert kind in JOB_KINDS, f'Unknown job kind {kind}'
+        if kind != 'validate' and not target:
+            # an empty target resolves to the working directory, which the
+            # job would clear
+            raise ValueError(f'A target is required for {kind} jobs')
+        now = time.time()
+        with closing(self._connect()) as conn:
+            failures = conn.execute(
+                'SELECT COUNT(*) FROM jobs '
+                'WHERE kind = ? AND source = ? AND (status = ? OR attempts > 1)',
+                (kind, source, JobStatus.FAILED),
+            ).fetchone()[0]
+            cursor = conn.execute(
+                'INSERT INTO jobs (kind, source, target, priority, failures, status, '
+                'max_attempts, timeout, created, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    kind,
+                    source,
+                    target,
+                    priority,
+                    failures,
+                    JobStatus.PENDING,
+                    max_attempts,
+                    timeout,
+                    now,
+                    now,
+                ),
+            )
+            return cursor.lastrowid
+
+    def claim(self) -> Optional[Job]:
+        """
+        Atomically mark the next pending job as running.
+
+        Returns:
+            Optional[Job]: The claimed job, or None if no job is pending.
+        """
+        with closing(self._connect()) as conn:
+            return self._claim(conn)
+
+    def _claim(self, conn: sqlite3.Connection) -> Optional[Job]:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT * FROM jobs WHERE status = ? '
+                'ORDER BY priority DESC, failures DESC, id ASC LIMIT 1',
+                (JobStatus.PENDING,),
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, updated = ? '
+                'WHERE id = ?',
+                (JobStatus.RUNNING, time.time(), row['id']),
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(row['id'])
+
+    def get(self, job_id: int) -> Job:
+        """
+        Get a job by id.
+
+        Args:
+            job_id (int): The id of the job.
+
+        Returns:
+            Job: The job.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return Job(**{k: row[k] for k in Job.__dataclass_fields__})
+
+    def complete(self, job_id: int):
+        """
+        Mark a job as done.
+
+        Args:
+            job_id (int): The id of the job.
+        """
+        self._set_status(job_id, JobStatus.DONE, None)
+
+    def fail(self, job_id: int, error: str):
+        """
+        Record a failed attempt. The job is retried until it runs out of
+        attempts.
+
+        Args:
+            job_id (int): The id of the job.
+            error (str): Description of the failure.
+        """
+        job = self.get(job_id)
+        status = JobStatus.PENDING
+        if job.attempts >= job.max_attempts:
+            status = JobStatus.FAILED
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, failures = failures + 1, '
+                'updated = ? WHERE id = ?',
+                (status, error, time.time(), job_id),
+            )
+
+    def recover(self) -> int:
+        """
+        Return jobs left running by a crashed scheduler to the queue.
+
+        Returns:
+            int: The number of recovered jobs.
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, updated = ? WHERE status = ?',
+                (JobStatus.PENDING, time.time(), JobStatus.RUNNING),
+            )
+            return cursor.rowcount
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Count jobs by status.
+
+        Returns:
+            Dict[str, int]: The number of jobs in each status.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT status, COUNT(*) FROM jobs GROUP BY status'
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def list_jobs(self, status: str = None) -> List[Job]:
+        """
+        List jobs, optionally filtered by status.
+
+        Args:
+            status (str): Only list jobs in this status.
+
+        Returns:
+            List[Job]: The jobs in insertion order.
+        """
+        query = 'SELECT id FROM jobs'
+        params = ()
+        if status is not None:
+            query += ' WHERE status = ?'
+            params = (status,)
+        with closing(self._connect()) as conn:
+            ids = [row[0] for row in conn.execute(query + ' ORDER BY id', params)]
+        return [self.get(job_id) for job_id in ids]
+
+    def _set_status(self, job_id: int, status: str, error: Optional[str]):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?',
+                (status, error, time.time(), job_id),
+            )
+
+
+def _run_job(kind: str, source: str, target: str, runner_args, container_name, conn):
+    """
+    Entry point of the process executing a single job.
+    """
+    try:
+        if kind == 'extract':
+            run_extract(Path(source), Path(target))
+        elif kind == 'execute':
+            runner = create_runner(runner_args, container_name)
+            run_execute(Path(source), Path(target), runner)
+        elif kind == 'validate':
+            run_verify(Path(source))
+        conn.send(None)
+    except BaseException:
+        conn.send(traceback.format_exc())
+        raise
+
+
+class Scheduler:
+    """
+    Runs queued jobs with a fixed number of concurrent workers.
+
+    Every attempt runs in its own process so a stuck container can be
+    killed once the job exceeds its timeout without stalling other workers.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        runner_args: argparse.Namespace,
+        num_workers: int = 1,
+        default_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize the Scheduler.
+
+        Args:
+            queue (JobQueue): The job queue.
+            runner_args (argparse.Namespace): Runner options of execute jobs.
+            num_workers (int): The number of concurrent workers.
+            default_timeout (float): Timeout of jobs enqueued without one.
+        """
+        self.queue = queue
+        self.runner_args = runner_args
+        self.num_workers = num_workers
+        self.default_timeout = default_timeout
+        self.ctx = multiprocessing.get_context('spawn')
+
+    def run(self):
+        """
+        Process jobs until the queue has no pending jobs left.
+        """
+        recovered = self.queue.recover()
+        if recovered > 0:
+            print(f'Resuming {recovered} interrupted jobs')
+
+        workers = [
+            threading.Thread(target=self._work, args=(i,), daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        print('Job summary:', self.queue.summary())
+
+    def _work(self, worker_id: int):
+        container_name = f'apollo_dev_deft_worker_{worker_id}'
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                return
+            error = self._attempt(job, container_name)
+            if error is None:
+                print(f'[worker {worker_id}] job {job.id} ({job.kind}) done')
+                self.queue.complete(job.id)
+            else:
+                print(f'[worker {worker_id}] job {job.id} ({job.kind}) failed')
+                self.queue.fail(job.id, error)
+
+    def _attempt(self, job: Job, container_name: str) -> Optional[str]:
+        timeout = job.timeout if job.timeout is not None else self.default_timeout
+        recv_conn, send_conn = self.ctx.Pipe(duplex=False)
+        proc = self.ctx.Process(
+            target=_run_job,
+            args=(
+                job.kind,
+                job.source,
+                job.target,
+                self.runner_args,
+                container_name,
+                send_conn,
+            ),
+        )
+        proc.start()
+        send_conn.close()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        # the result is received while waiting, as the job process blocks
+        # sending a traceback larger than the pipe buffer until it is read
+        error = None
+        if recv_conn.poll(timeout):
+            try:
+                error = recv_conn.recv()
+            except EOFError:
+                # exited without sending a result
+                pass
+        if deadline is None:
+            proc.join()
+        else:
+            proc.join(max(0.0, deadline - time.monotonic()))
+
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+            if job.kind == 'execute':
+                runner = create_runner(self.runner_args, container_name)
+                try:
+                    runner.cleanup()
+                except Exception:
+                    traceback.print_exc()
+            return f'Timed out after {timeout} seconds'
+
+        if proc.exitcode != 0:
+            return error or f'Exited with code {proc.exitcode}'
+        return error
+
+
+def main(parser):
+    parser.add_argument(
+        '--db',
+        default='out/jobs.sqlite',
+        help='SQLite file storing the job queue',
+    )
+
+    subparsers = parser.add_subparsers(dest='batch_command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Add jobs to the queue')
+    enqueue_parser.add_argument('kind', choices=JOB_KINDS, help='Kind of job')
+    enqueue_parser.add_argument(
+        'source',
+        nargs='?',
+        help='Record file (extract), frames directory (execute) '
+        'or outputs directory (validate)',
+    )
+    enqueue_parser.add_argument(
+        'target',
+        nargs='?',
+        default='',
+        help='Frames directory (extract) or outputs directory (execute)',
+    )
+    enqueue_parser.add_argument(
+        '--manifest',
+        help='File listing one "source [target]" pair per line',
+    )
+    enqueue_parser.add_argument(
+        '--priority', type=int, default=0, help='Jobs with higher priority run first'
+    )
+    enqueue_parser.add_argument(
+        '--max-attempts', type=int, default=3, help='Attempts before a job fails'
+    )
+    enqueue_parser.add_argument(
+        '--timeout', type=float, default=None, help='Timeout of one attempt (seconds)'
+    )
+
+    run_parser = subparsers.add_parser('run', help='Run queued jobs')
+    run_parser.add_argument(
+        '--workers', type=int, default=1, help='Number of concurrent workers'
+    )
+    run_parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        help='Timeout of jobs enqueued without one (seconds)',
+    )
+    add_runner_arguments(run_parser)
+
+    subparsers.add_parser('status', help='Show the state of the queue')
+
+    def handler(args):
+        db = Path(args.db)
+        db.parent.mkdir(parents=True, exist_ok=True)
+        queue = JobQueue(db)
+
+        if args.batch_command == 'enqueue':
+            if args.manifest is None and args.source is None:
+                enqueue_parser.error('Either a source or --manifest is required')
+            if args.kind != 'validate' and args.manifest is None and not args.target:
+                enqueue_parser.error(f'A target is required for {args.kind} jobs')
+            pairs = []
+            if args.manifest is not None:
+                with open(args.manifest, 'r') as fp:
+                    for lineno, line in enumerate(fp, 1):
+                        elements = line.split()
+                        if len(elements) == 0:
+                            continue
+                        if args.kind != 'validate' and len(elements) < 2:
+                            enqueue_parser.error(
+                                f'{args.manifest}:{lineno}: '
+                                f'A target is required for {args.kind} jobs'
+                            )
+                        pairs.append((elements[0], ' '.join(elements[1:])))
+            else:
+                pairs.append((args.source, args.target))
+            for source, target in pairs:
+                queue.enqueue(
+                    args.kind,
+                    source,
+                    target,
+                    args.priority,
+                    args.max_attempts,
+                    args.timeout,
+                )
+            print(f'Enqueued {len(pairs)} jobs')
+        elif args.batch_command == 'run':
+            if args.workers < 1:
+                run_parser.error('Number of workers must be positive')
+            runner_args = argparse.Namespace(runner=args.runner, planner=args.planner)
+            Scheduler(queue, runner_args, args.workers, args.timeout).run()
+        elif args.batch_command == 'status':
+            print('Job summary:', queue.summary())
+            for job in queue.list_jobs(JobStatus.FAILED):
+                last_line = (job.error or '').strip().splitlines()[-1:]
+                print(f'{job.id} {job.kind} {job.source}: {"".join(last_line)}')
+
+    parser.set_defaults(func=handler)
@@ -0,0 +1,197 @@
+import json
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Set
+
+from deft.canonical import digest_planning_bin
+from deft.execute import add_runner_arguments, create_runner
+from deft.runner import DeFTRunner
+
+# placeholder digest of frames without output
+MISSING = 'missing'
+
+
+def collect_digests(outputs_dir: Path) -> Dict[int, str]:
+    """
+    Compute the canonical digest of every ``deft.bin`` under ``outputs_dir``.
+
+    Parameters
+    ----------
+    outputs_dir : Path
+        Directory containing execution outputs.
+
+    Returns
+    -------
+    Dict[int, str]
+        Canonical digests keyed by frame index.
+    """
+    digests = dict()
+    for frame_dir in Path(outputs_dir).iterdir():
+        if frame_dir.is_dir() and frame_dir.name.isdigit():
+            output = frame_dir / 'deft.bin'
+            digests[int(frame_dir.name)] = (
+                digest_planning_bin(output) if output.exists() else MISSING
+            )
+    return digests
+
+
+def find_nondeterministic_frames(
+    repeat_digests: List[Dict[int, str]],
+) -> Dict[int, List[str]]:
+    """
+    Find frames whose output differs across repeated executions.
+
+    Parameters
+    ----------
+    repeat_digests : List[Dict[int, str]]
+        Canonical digests of each repeat, keyed by frame index.
+
+    Returns
+    -------
+    Dict[int, List[str]]
+        Digests of each repeat for every frame that varies.
+    """
+    distinct: Dict[int, Set[str]] = defaultdict(set)
+    for digests in repeat_digests:
+        for index, digest in digests.items():
+            distinct[index].add(digest)
+
+    result = dict()
+    for index in sorted(distinct):
+        if len(distinct[index]) > 1 or any(
+            index not in digests for digests in repeat_digests
+        ):
+            result[index] = [digests.get(index, MISSING) for digests in repeat_digests]
+    return result
+
+
+def run_stress(
+    frames_dir: Path,
+    outputs_dir: Path,
+    create_runner_for: Callable[[int], DeFTRunner],
+    repeat: int,
+    workers: int = 1,
+) -> Dict[int, List[str]]:
+    """
+    Execute the same module tests several times and compare the outputs.
+
+    Parameters
+    ----------
+    frames_dir : Path
+        Directory containing extracted frames.
+    outputs_dir : Path
+        Directory to store the outputs of every repeat.
+    create_runner_for : Callable[[int], DeFTRunner]
+        Creates the runner of a worker slot. Concurrent slots must not share
+        resources such as containers.
+    repeat : int
+        Number of executions.
+    workers : int
+        Number of executions running concurrently.
+
+    Returns
+    -------
+    Dict[int, List[str]]
+        Digests of each repeat for every frame that varies.
+    """
+    if outputs_dir.exists():
+        shutil.rmtree(outputs_dir)
+    outputs_dir.mkdir(parents=True)
+
+    runners = [create_runner_for(slot) for slot in range(workers)]
+
+    def execute(k: int) -> Dict[int, str]:
+        repeat_dir = outputs_dir / f'repeat_{k}'
+        runners[k % workers].run(frames_dir, repeat_dir)
+        return collect_digests(repeat_dir)
+
+    # repeats sharing a slot run one after another
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        slots = [
+            executor.submit(
+                lambda s: [execute(k) for k in range(s, repeat, workers)], slot
+            )
+            for slot in range(workers)
+        ]
+        by_slot = [f.result() for f in slots]
+    repeat_digests = [by_slot[k % workers][k // workers] for k in range(repeat)]
+
+    varying = find_nondeterministic_frames(repeat_digests)
+    num_frames = len(set().union(*[d.keys() for d in repeat_digests]))
+
+    with open(outputs_dir / 'stress.json', 'w') as fp:
+        json.dump(
+            {
+                'repeat': repeat,
+                'num_frames': num_frames,
+                'nondeterministic_frames': {str(k): v for k, v in varying.items()},
+            },
+            fp,
+            indent=2,
+        )
+
+    print('Total frames:', num_frames)
+    print('Repeats:', repeat)
+    print('Non-deterministic frames:', len(varying))
+    for index, digests in varying.items():
+        print(f'  Frame {index}: {len(set(digests))} distinct outputs')
+    return varying
+
+
+def main(parser):
+    parser.add_argument(
+        '--frames-dir',
+        default='out/testdata',
+        help='Directory containing extracted frames',
+    )
+
+    parser.add_argument(
+        '--outputs-dir',
+        default='out/testdata_stress',
+        help='Directory to store the outputs of every repeat',
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        required=True,
+        help='Number of times the module tests are executed',
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of executions running concurrently',
+    )
+
+    add_runner_arguments(parser)
+
+    def handler(args):
+        frames_dir = Path(args.frames_dir)
+
+        if not frames_dir.exists():
+            parser.error('Frames directory does not exist')
+
+        if args.repeat < 2:
+            parser.error('At least two repeats are required')
+
+        if args.workers < 1:
+            parser.error('Number of workers must be positive')
+
+        try:
+            create_runner(args)
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(str(e))
+
+        run_stress(
+            frames_dir,
+            Path(args.outputs_dir),
+            lambda slot: create_runner(args, f'apollo_dev_deft_stress_{slot}'),
+            args.repeat,
+            min(args.workers, args.repeat),
+        )
+
+    parser.set_defaults(func=handler)
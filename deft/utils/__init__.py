@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from typing import List
 
+import numpy as np
 from bs4 import BeautifulSoup, NavigableString
 from cyber_record.record import Record
 from google.protobuf import text_format
@@ -9,7 +10,7 @@ from google.protobuf import text_format
 from apollo_modules.modules.planning.proto.planning_pb2 import ADCTrajectory
 
 # from deft.representation.frame import Frame
-from deft.representation.trajectory import PathPoint, Trajectory
+from deft.representation.trajectory import Trajectory
 from deft.utils.apollo_topics import ApolloTopics
 
 LOGGING_FORMAT = (
@@ -34,27 +35,17 @@ LOGGING_FORMAT = (
 
 def get_vehicle_trajectory(messages_record_path: str):
     record = Record(messages_record_path)
-    path_points = []
+    points = []
     for _, msg, _ in record.read_messages(topics=[ApolloTopics.LOCALIZATION]):
         x = msg.pose.position.x
         y = msg.pose.position.y
         t = msg.header.timestamp_sec
-        path_point = PathPoint(x, y, 0, 0, t)
-        path_points.append(path_point)
-    return Trajectory(path_points)
+        points.append((x, y, 0, 0, t))
+    return Trajectory(np.array(points, dtype=np.float64))
 
 
 def get_trajectory_from_planning_message(msg) -> Trajectory:
-    path_points = []
-    for tp in msg.trajectory_point:
-        x = tp.path_point.x
-        y = tp.path_point.y
-        v = tp.v
-        a = tp.a
-        t = tp.relative_time + msg.header.timestamp_sec
-        path_point = PathPoint(x, y, v, a, t)
-        path_points.append(path_point)
-    return Trajectory(path_points)
+    return Trajectory.from_planning_message(msg)
 
 
 def get_trajectory_from_planning_ascii(filename: str) -> Trajectory:
@@ -74,16 +65,15 @@ def get_trajectory_from_planning_json(json_path: str) -> Trajectory:
     with open(json_path, 'r') as f:
         data = json.load(f)
     header_timestamp_sec = data['header']['timestampSec']
-    path_points = []
+    points = []
     for tp in data['trajectoryPoint']:
         x = tp['pathPoint']['x']
         y = tp['pathPoint']['y']
         v = tp['v']
         a = tp['a']
         t = tp['relativeTime'] + header_timestamp_sec
-        path_point = PathPoint(x, y, v, a, t)
-        path_points.append(path_point)
-    return Trajectory(path_points)
+        points.append((x, y, v, a, t))
+    return Trajectory(np.array(points, dtype=np.float64))
 
 
 def get_planning_messages(messages_record_path: str) -> List:
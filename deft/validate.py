@@ -1,52 +1,548 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from enum import IntFlag
+from functools import partial
 from pathlib import Path
+from typing import Callable, Collection, Dict, List, NamedTuple, Tuple
 
+from apollo_modules.modules.common.proto.header_pb2 import Header
 from apollo_modules.modules.planning.proto.planning_pb2 import ADCTrajectory
-from deft.representation.trajectory import euclidean_distance
-from deft.utils import get_trajectory_from_planning_bin
+from deft.canonical import digest_message, read_stored_digest, store_digest
+from deft.report import ValidationReport
+from deft.representation.similarity import FEATURES, METRICS, get_metric
+from deft.representation.trajectory import (
+    Trajectory,
+    batch_euclidean_distance,
+    euclidean_distance,
+    pad_trajectories,
+)
+from deft.runner import ABORT_SENTINEL, COMPLETION_MARKER, START_MARKER, read_marker
+from deft.utils import get_trajectory_from_planning_message
+from deft.watcher import DirectoryWatcher, create_watcher
 
+DUMP_TEXT_MODES = ['none', 'failing', 'all']
 
-def run_verify(outputs_dir: Path):
+# reproduced and recorded planning message of a frame
+FRAME_FILES = ['deft.bin', 'planning.bin']
+
+
+def read_planning_bin(filename: Path) -> ADCTrajectory:
     """
-    Verify reproduced planning trajectories.
+    Parse a binary planning message file.
 
     Parameters
     ----------
-    outputs_dir : Path
-        Directory containing execution outputs (e.g., planning.bin files).
+    filename : Path
+        The binary planning message file.
+
+    Returns
+    -------
+    ADCTrajectory
+        The planning message.
     """
+    msg = ADCTrajectory()
+    with open(filename, 'rb') as f:
+        msg.ParseFromString(f.read())
+    return msg
 
-    reproduce_errors = []
 
-    testdata_out = Path(outputs_dir)
-    print('Comparing trajectories...')
-    for test_index in testdata_out.iterdir():
-        if test_index.is_dir():
-            output = get_trajectory_from_planning_bin(test_index / 'deft.bin')
-            with open(test_index / 'deft.bin', 'rb') as f:
-                ob = ADCTrajectory()
-                ob.ParseFromString(f.read())
-                with open(test_index / 'deft.bin.txt', 'w') as f_txt:
-                    f_txt.write(str(ob))
-
-            expected = get_trajectory_from_planning_bin(test_index / 'planning.bin')
-            with open(test_index / 'planning.bin', 'rb') as f:
-                ob = ADCTrajectory()
-                ob.ParseFromString(f.read())
-                with open(test_index / 'planning.bin.txt', 'w') as f_txt:
-                    f_txt.write(str(ob))
-
-            dist = euclidean_distance(output, expected)
-            reproduce_errors.append(dist)
+def write_text_dumps(frame_dir: Path, messages: Dict[str, ADCTrajectory] = None):
+    """
+    Convert ``deft.bin`` and ``planning.bin`` of a frame into ASCII format,
+    written next to them as ``deft.bin.txt`` and ``planning.bin.txt``.
+
+    Parameters
+    ----------
+    frame_dir : Path
+        Directory of the frame.
+    messages : Dict[str, ADCTrajectory]
+        Already parsed messages keyed by file name. Files without a parsed
+        message are parsed on demand.
+    """
+    messages = messages or dict()
+    for name in FRAME_FILES:
+        filename = frame_dir / name
+        if name not in messages and not filename.exists():
+            continue
+        msg = messages.get(name) or read_planning_bin(filename)
+        with open(frame_dir / f'{name}.txt', 'w') as f_txt:
+            f_txt.write(str(msg))
+
+
+def load_messages(frame_dir: Path) -> Dict[str, ADCTrajectory]:
+    """
+    Parse ``deft.bin`` and ``planning.bin`` of a single frame.
+
+    Parameters
+    ----------
+    frame_dir : Path
+        Directory containing ``deft.bin`` and ``planning.bin`` of the frame.
+
+    Returns
+    -------
+    Dict[str, ADCTrajectory]
+        The reproduced and the recorded planning message keyed by file name.
+    """
+    return {name: read_planning_bin(frame_dir / name) for name in FRAME_FILES}
+
 
+def stored_digests_match(frame_dir: Path) -> bool:
+    """
+    Check whether the stored canonical digests of ``deft.bin`` and
+    ``planning.bin`` of a frame show that the frame is exactly reproduced.
+
+    Parameters
+    ----------
+    frame_dir : Path
+        Directory containing ``deft.bin`` and ``planning.bin`` of the frame.
+
+    Returns
+    -------
+    bool
+        True if both digests are stored, up to date and equal.
+    """
+    digests = [read_stored_digest(frame_dir / name) for name in FRAME_FILES]
+    return digests[0] is not None and digests[0] == digests[1]
+
+
+def verify_frame(frame_dir: Path, dump_text: bool = False) -> float:
+    """
+    Compare the reproduced planning trajectory of a single frame with the
+    recorded one.
+
+    Parameters
+    ----------
+    frame_dir : Path
+        Directory containing ``deft.bin`` and ``planning.bin`` of the frame.
+    dump_text : bool
+        Whether to also convert both files into ASCII format.
+
+    Returns
+    -------
+    float
+        The reproduce error of the frame.
+    """
+    result = verify_frames([frame_dir], 'all' if dump_text else 'none')[0]
+    if result.flags:
+        raise ValueError(f'Cannot verify frame {result.index}: {result.flags!r}')
+    return result.distance
+
+
+def print_summary(reproduce_errors: List[float]):
+    """
+    Print summary statistics of reproduce errors.
+
+    Parameters
+    ----------
+    reproduce_errors : List[float]
+        Reproduce errors of all frames.
+    """
     # print total number of reproduced trajectories
     print('Total reproduced trajectories:', len(reproduce_errors))
 
+    if len(reproduce_errors) == 0:
+        return
+
     # print min, max, avg reproduce error
     print('Min reproduce error:', min(reproduce_errors))
     print('Max reproduce error:', max(reproduce_errors))
     print('Avg reproduce error:', sum(reproduce_errors) / len(reproduce_errors))
 
 
+class FrameFlags(IntFlag):
+    """
+    Problems that prevent comparing the trajectories of a frame.
+    """
+
+    NONE = 0
+    MISSING_OUTPUT = 1
+    EMPTY_OUTPUT = 2
+    EMPTY_EXPECTED = 4
+
+
+class FrameResult(NamedTuple):
+    """
+    Compact result of verifying a single frame.
+    """
+
+    index: int
+    distance: float
+    flags: FrameFlags
+    sequence_num: int = -1
+    timestamp: float = float('nan')
+
+
+def read_frame_header(frame_dir: Path) -> Tuple[int, float]:
+    """
+    Read the planning sequence number and the timestamp of a frame from the
+    header written at extraction.
+
+    Parameters
+    ----------
+    frame_dir : Path
+        Directory of the frame.
+
+    Returns
+    -------
+    Tuple[int, float]
+        The sequence number and the timestamp, or -1 and NaN if the frame
+        has no header.
+    """
+    filename = frame_dir / 'header.bin'
+    if not filename.exists():
+        return -1, float('nan')
+    header = Header()
+    with open(filename, 'rb') as f:
+        header.ParseFromString(f.read())
+    return header.sequence_num, header.timestamp_sec
+
+
+def list_frames(outputs_dir: Path) -> List[Path]:
+    """
+    List frame directories in frame-index order.
+
+    Parameters
+    ----------
+    outputs_dir : Path
+        Directory containing execution outputs.
+
+    Returns
+    -------
+    List[Path]
+        Frame directories sorted by index.
+    """
+    frame_dirs = [
+        d for d in Path(outputs_dir).iterdir() if d.is_dir() and d.name.isdigit()
+    ]
+    return sorted(frame_dirs, key=lambda d: int(d.name))
+
+
+def verify_frames(
+    frame_dirs: List[Path],
+    dump_text: str = 'none',
+    dump_frames: Collection[int] = (),
+    threshold: float = 0.0,
+    metric: Callable[[Trajectory, Trajectory], float] = euclidean_distance,
+) -> List[FrameResult]:
+    """
+    Verify a group of frames. With the default metric, all valid frames are
+    compared in a single vectorized pass.
+
+    Parameters
+    ----------
+    frame_dirs : List[Path]
+        Frame directories to verify.
+    dump_text : str
+        Frames converted into ASCII format: ``none``, ``failing`` (flagged
+        frames and frames whose reproduce error exceeds ``threshold``) or
+        ``all``.
+    dump_frames : Collection[int]
+        Indices of frames converted into ASCII format regardless of
+        ``dump_text``.
+    threshold : float
+        Largest reproduce error of a frame that is not failing.
+    metric : Callable[[Trajectory, Trajectory], float]
+        The metric measuring reproduce errors.
+
+    Returns
+    -------
+    List[FrameResult]
+        Results in the order of ``frame_dirs``. The distance of flagged
+        frames is NaN, and the distance of frames whose outputs have equal
+        canonical digests is 0 without comparing trajectories. Digests are
+        stored alongside the outputs.
+    """
+    results = []
+    pending = []
+    outputs = []
+    expected = []
+    for frame_dir in frame_dirs:
+        index = int(frame_dir.name)
+        dump = dump_text == 'all' or index in dump_frames
+        flags = FrameFlags.NONE
+        distance = float('nan')
+        if not (frame_dir / 'deft.bin').exists():
+            flags |= FrameFlags.MISSING_OUTPUT
+        elif stored_digests_match(frame_dir):
+            # exactly reproduced frames compared before are not parsed again
+            distance = 0.0
+            if dump:
+                write_text_dumps(frame_dir)
+        else:
+            messages = load_messages(frame_dir)
+            if dump:
+                write_text_dumps(frame_dir, messages)
+            # digests clear volatile fields, while trajectories are timed by
+            # the header timestamp, which is restored if they are needed
+            timestamps = [messages[name].header.timestamp_sec for name in FRAME_FILES]
+            digests = []
+            for name in FRAME_FILES:
+                digests.append(digest_message(messages[name]))
+                store_digest(frame_dir / name, digests[-1])
+
+            if digests[0] == digests[1]:
+                distance = 0.0
+            else:
+                for name, timestamp in zip(FRAME_FILES, timestamps):
+                    messages[name].header.timestamp_sec = timestamp
+                output, recorded = (
+                    get_trajectory_from_planning_message(messages[name])
+                    for name in FRAME_FILES
+                )
+                if len(output) == 0:
+                    flags |= FrameFlags.EMPTY_OUTPUT
+                if len(recorded) == 0:
+                    flags |= FrameFlags.EMPTY_EXPECTED
+                if not flags:
+                    pending.append(len(results))
+                    outputs.append(output)
+                    expected.append(recorded)
+        results.append(
+            FrameResult(index, distance, flags, *read_frame_header(frame_dir))
+        )
+
+    if metric is euclidean_distance:
+        distances = batch_euclidean_distance(
+            *pad_trajectories(outputs), *pad_trajectories(expected)
+        ).tolist()
+    else:
+        distances = [metric(o, e) for o, e in zip(outputs, expected)]
+    for i, distance in zip(pending, distances):
+        results[i] = results[i]._replace(distance=distance)
+
+    if dump_text == 'failing':
+        # messages of failing frames are parsed again, as they are rare
+        for frame_dir, r in zip(frame_dirs, results):
+            already_dumped = r.index in dump_frames and not (
+                r.flags & FrameFlags.MISSING_OUTPUT
+            )
+            if (r.flags or r.distance > threshold) and not already_dumped:
+                write_text_dumps(frame_dir)
+    return results
+
+
+def run_verify(
+    outputs_dir: Path,
+    workers: int = 1,
+    dump_text: str = 'none',
+    dump_frames: Collection[int] = (),
+    threshold: float = 0.0,
+    metric: Callable[[Trajectory, Trajectory], float] = euclidean_distance,
+) -> List[FrameResult]:
+    """
+    Verify reproduced planning trajectories.
+
+    Parameters
+    ----------
+    outputs_dir : Path
+        Directory containing execution outputs (e.g., planning.bin files).
+    workers : int
+        Number of worker processes. Frames are partitioned into contiguous
+        chunks that are verified in parallel.
+    dump_text : str
+        Frames converted into ASCII format: ``none``, ``failing`` or ``all``.
+    dump_frames : Collection[int]
+        Indices of frames converted into ASCII format regardless of
+        ``dump_text``.
+    threshold : float
+        Largest reproduce error of a frame that is not failing.
+    metric : Callable[[Trajectory, Trajectory], float]
+        The metric measuring reproduce errors.
+
+    Returns
+    -------
+    List[FrameResult]
+        Results of all frames in frame-index order.
+    """
+    frame_dirs = list_frames(outputs_dir)
+
+    verify = partial(
+        verify_frames,
+        dump_text=dump_text,
+        dump_frames=frozenset(dump_frames),
+        threshold=threshold,
+        metric=metric,
+    )
+
+    print('Comparing trajectories...')
+    if workers <= 1 or len(frame_dirs) <= 1:
+        results = verify(frame_dirs)
+    else:
+        # several chunks per worker balance uneven frame sizes
+        chunk_size = -(-len(frame_dirs) // (workers * 4))
+        chunks = [
+            frame_dirs[i : i + chunk_size]
+            for i in range(0, len(frame_dirs), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [r for chunk in executor.map(verify, chunks) for r in chunk]
+        results.sort(key=lambda r: r.index)
+
+    print_results(results)
+    return results
+
+
+def print_results(results: List[FrameResult]):
+    """
+    Print summary statistics of reproduce errors and the number of frames
+    that could not be compared.
+
+    Parameters
+    ----------
+    results : List[FrameResult]
+        Results of all frames.
+    """
+    print_summary([r.distance for r in results if not r.flags])
+    for flag in FrameFlags:
+        if flag and any(flag in r.flags for r in results):
+            count = sum(flag in r.flags for r in results)
+            print(f'Frames with {flag.name.lower().replace("_", " ")}: {count}')
+
+
+def follow_verify(
+    outputs_dir: Path,
+    watcher: DirectoryWatcher = None,
+    abort_threshold: float = None,
+    idle_timeout: float = 60.0,
+    dump_text: str = 'none',
+    dump_frames: Collection[int] = (),
+    threshold: float = 0.0,
+    metric: Callable[[Trajectory, Trajectory], float] = euclidean_distance,
+) -> List[FrameResult]:
+    """
+    Verify reproduced planning trajectories while the module tests are
+    running. Frames are verified in index order as soon as their
+    ``deft.bin`` is written, and failing frames are printed right away.
+
+    Parameters
+    ----------
+    outputs_dir : Path
+        Directory the runner writes execution outputs to.
+    watcher : DirectoryWatcher
+        Watcher notified of new outputs. Defaults to ``create_watcher()``.
+    abort_threshold : float
+        Reproduce error above which the execution is aborted by writing
+        ``ABORT_SENTINEL`` to the outputs directory. None never aborts.
+    idle_timeout : float
+        Seconds without a new output after which following stops.
+    dump_text : str
+        Frames converted into ASCII format: ``none``, ``failing`` or ``all``.
+    dump_frames : Collection[int]
+        Indices of frames converted into ASCII format regardless of
+        ``dump_text``.
+    threshold : float
+        Largest reproduce error of a frame that is not failing.
+    metric : Callable[[Trajectory, Trajectory], float]
+        The metric measuring reproduce errors.
+
+    Returns
+    -------
+    List[FrameResult]
+        Results of all frames in frame-index order. Frames the runner did not
+        reach are flagged with a missing output.
+
+    Only outputs of the run identified by ``START_MARKER`` are verified:
+    outputs older than the marker and completion markers of another run are
+    ignored. If a new run starts while following, e.g. when following began
+    before the runner cleared the outputs of the previous one, frames are
+    verified again from the first one. A run already complete when following
+    began is only verified once ``idle_timeout`` passes without a new run.
+    """
+    outputs_dir = Path(outputs_dir)
+    following_since = time.time()
+    run_id, started = None, float('nan')
+
+    def is_fresh(path: Path) -> bool:
+        # NaN before the start of a run compares as stale
+        try:
+            return path.stat().st_mtime >= started
+        except FileNotFoundError:
+            return False
+
+    watcher = watcher or create_watcher()
+    verify = partial(
+        verify_frames,
+        dump_text=dump_text,
+        dump_frames=frozenset(dump_frames),
+        threshold=threshold,
+        metric=metric,
+    )
+
+    print('Following outputs...')
+    results = []
+    index = 0
+    last_output = time.monotonic()
+    try:
+        while True:
+            # the marker is briefly missing while the runner replaces the
+            # outputs, which does not start a new run
+            marker_id, marker_time = read_marker(outputs_dir / START_MARKER)
+            if marker_id is not None and marker_id != run_id:
+                if run_id is not None:
+                    print('A new run started, following it from the first frame')
+                # the outputs directory was replaced as well
+                watcher.unwatch(outputs_dir / str(index))
+                watcher.unwatch(outputs_dir)
+                run_id, started = marker_id, marker_time
+                results, index = [], 0
+                last_output = time.monotonic()
+
+            frame_dir = outputs_dir / str(index)
+            output = frame_dir / 'deft.bin'
+            # both are watched again, as they may be created after the start
+            watcher.watch(outputs_dir)
+            watcher.watch(frame_dir)
+
+            if not is_fresh(output):
+                # the runner writes the last output before the marker
+                done_id, done_time = read_marker(outputs_dir / COMPLETION_MARKER)
+                complete = run_id is not None and done_id == run_id
+                if complete and done_time >= following_since and not is_fresh(output):
+                    break
+                idle = time.monotonic() - last_output
+                if idle >= idle_timeout:
+                    if not complete:
+                        print(f'No new outputs for {idle_timeout} seconds')
+                    break
+                watcher.wait(idle_timeout - idle)
+                continue
+
+            result = verify([frame_dir])[0]
+            results.append(result)
+            watcher.unwatch(frame_dir)
+            last_output = time.monotonic()
+            index += 1
+
+            if result.flags:
+                print(f'Frame {result.index}: {result.flags!r}')
+            elif result.distance > threshold:
+                print(f'Frame {result.index}: reproduce error {result.distance}')
+            if abort_threshold is not None and result.distance > abort_threshold:
+                print(f'Aborting execution after frame {result.index}...')
+                (outputs_dir / ABORT_SENTINEL).touch()
+                break
+    finally:
+        watcher.unwatch(outputs_dir / str(index))
+        watcher.unwatch(outputs_dir)
+        watcher.close()
+
+    # frames the runner did not reach, whose stale outputs are not verified
+    frame_dirs = list_frames(outputs_dir) if outputs_dir.is_dir() else []
+    remaining = [d for d in frame_dirs if int(d.name) >= index]
+    results += verify([d for d in remaining if is_fresh(d / 'deft.bin')])
+    for d in remaining:
+        if not is_fresh(d / 'deft.bin'):
+            flags = FrameFlags.MISSING_OUTPUT
+            results.append(
+                FrameResult(int(d.name), float('nan'), flags, *read_frame_header(d))
+            )
+    results.sort(key=lambda r: r.index)
+
+    print_results(results)
+    return results
+
+
 def main(parser):
     parser.add_argument(
         "--outputs-dir",
@@ -54,12 +550,131 @@ def main(parser):
         help="Directory containing execution outputs",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes comparing trajectories",
+    )
+
+    parser.add_argument(
+        "--dump-text",
+        choices=DUMP_TEXT_MODES,
+        default="none",
+        help="Frames whose deft.bin and planning.bin are converted into ASCII format",
+    )
+
+    parser.add_argument(
+        "--dump-frames",
+        type=int,
+        nargs="+",
+        default=[],
+        help="Indices of frames converted into ASCII format regardless of --dump-text",
+    )
+
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.0,
+        help="Largest reproduce error of a frame that is not failing",
+    )
+
+    parser.add_argument(
+        "--metric",
+        choices=list(METRICS),
+        default="euclidean",
+        help="Metric measuring reproduce errors",
+    )
+
+    parser.add_argument(
+        "--features",
+        choices=list(FEATURES),
+        default="xy",
+        help="Point features compared by the frechet, hausdorff and dtw metrics",
+    )
+
+    parser.add_argument(
+        "--dtw-window",
+        type=int,
+        default=10,
+        help="Width of the Sakoe-Chiba band of the dtw metric, in points",
+    )
+
+    parser.add_argument(
+        "--report-dir",
+        default=None,
+        help="Directory to write report.csv and report.npz to (default: --outputs-dir)",
+    )
+
+    parser.add_argument(
+        "--worst-k",
+        type=int,
+        default=10,
+        help="Number of frames with the largest reproduce error to report",
+    )
+
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Verify frames as the runner writes them, until it is done",
+    )
+
+    parser.add_argument(
+        "--abort-threshold",
+        type=float,
+        default=None,
+        help="Abort the execution once a reproduce error exceeds this (with --follow)",
+    )
+
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds without a new output after which --follow stops",
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.1,
+        help="Polling interval of --follow where inotify is unavailable",
+    )
+
     def handler(args):
         outputs_dir = Path(args.outputs_dir)
 
-        if not outputs_dir.exists():
+        if not args.follow and not outputs_dir.exists():
             parser.error("Outputs directory does not exist")
 
-        run_verify(outputs_dir)
+        if args.workers < 1:
+            parser.error("Number of workers must be positive")
+
+        metric = get_metric(args.metric, args.features, args.dtw_window)
+        if args.follow:
+            results = follow_verify(
+                outputs_dir,
+                create_watcher(args.poll_interval),
+                args.abort_threshold,
+                args.idle_timeout,
+                args.dump_text,
+                args.dump_frames,
+                args.threshold,
+                metric,
+            )
+        else:
+            results = run_verify(
+                outputs_dir,
+                args.workers,
+                args.dump_text,
+                args.dump_frames,
+                args.threshold,
+                metric,
+            )
+
+        report = ValidationReport.from_results(results, worst_k=args.worst_k)
+        report.print()
+        report_dir = Path(args.report_dir) if args.report_dir else outputs_dir
+        report.write(report_dir)
+        print(f'Report saved to {report_dir}')
 
     parser.set_defaults(func=handler)
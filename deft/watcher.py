@@ -0,0 +1,147 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+# inotify(7) constants
+IN_CREATE = 0x00000100
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# largest time spent in a single wait, so that missed events only delay
+MAX_WAIT = 1.0
+
+
+class DirectoryWatcher:
+    """
+    Waits for files to be created or written in a set of directories.
+    """
+
+    def watch(self, directory: Path):
+        """
+        Start watching a directory. Directories that do not exist yet are
+        ignored.
+
+        Args:
+            directory (Path): The directory to watch.
+        """
+        raise NotImplementedError
+
+    def unwatch(self, directory: Path):
+        """
+        Stop watching a directory.
+
+        Args:
+            directory (Path): The directory to stop watching.
+        """
+        raise NotImplementedError
+
+    def wait(self, timeout: float):
+        """
+        Block until a file changes in a watched directory, or until the
+        timeout elapses.
+
+        Args:
+            timeout (float): The longest time to wait, in seconds.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PollingWatcher(DirectoryWatcher):
+    """
+    Watcher that sleeps for a fixed interval, for platforms without inotify.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        """
+        Initialize the PollingWatcher.
+
+        Args:
+            interval (float): The time between two polls, in seconds.
+        """
+        self.interval = interval
+
+    def watch(self, directory: Path):
+        pass
+
+    def unwatch(self, directory: Path):
+        pass
+
+    def wait(self, timeout: float):
+        time.sleep(max(0.0, min(timeout, self.interval)))
+
+
+class InotifyWatcher(DirectoryWatcher):
+    """
+    Watcher based on Linux inotify, accessed through libc.
+    """
+
+    MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches: Dict[Path, int] = dict()
+
+    def watch(self, directory: Path):
+        if directory in self.watches:
+            return
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(str(directory)), self.MASK
+        )
+        if wd >= 0:
+            self.watches[directory] = wd
+
+    def unwatch(self, directory: Path):
+        wd = self.watches.pop(directory, None)
+        if wd is not None:
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def wait(self, timeout: float):
+        timeout = max(0.0, min(timeout, MAX_WAIT))
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        # the events themselves are not needed, callers check the files
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(poll_interval: float = 0.1) -> DirectoryWatcher:
+    """
+    Create an inotify watcher on Linux, or a polling watcher elsewhere and
+    when inotify is unavailable.
+
+    Args:
+        poll_interval (float): The interval of the polling watcher, in seconds.
+
+    Returns:
+        DirectoryWatcher: The watcher.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(poll_interval)
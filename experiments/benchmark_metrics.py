@@ -0,0 +1,70 @@
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from deft.representation.similarity import get_metric
+from deft.representation.trajectory import (
+    Trajectory,
+    batch_euclidean_distance,
+    pad_trajectories,
+)
+
+# planning trajectories typically hold 100 to 400 points 0.1 seconds apart
+trajectory_lengths = [50, 100, 200, 400]
+metrics = ['euclidean', 'frechet', 'hausdorff', 'dtw']
+num_frames = 50
+batch_size = 1000
+
+rng = np.random.default_rng(0)
+
+
+def planned_trajectory(length: int, start_t: float) -> Trajectory:
+    t = start_t + np.arange(length) * 0.1
+    v = np.clip(5.0 + np.cumsum(rng.normal(0.0, 0.05, length)), 0.0, None)
+    heading = np.cumsum(rng.normal(0.0, 0.01, length))
+    x = np.cumsum(v * 0.1 * np.cos(heading))
+    y = np.cumsum(v * 0.1 * np.sin(heading))
+    a = np.gradient(v, 0.1)
+    return Trajectory(np.column_stack([x, y, v, a, t]))
+
+
+def perturbed(trajectory: Trajectory) -> Trajectory:
+    points = trajectory.points.copy()
+    points[:, :2] += rng.normal(0.0, 0.05, (len(points), 2))
+    return Trajectory(points)
+
+
+rows = []
+for length in trajectory_lengths:
+    expected = [planned_trajectory(length, 1000.0 + i) for i in range(num_frames)]
+    outputs = [perturbed(t) for t in expected]
+
+    for name in metrics:
+        metric = get_metric(name)
+
+        def run():
+            for o, e in zip(outputs, expected):
+                metric(o, e)
+
+        seconds = min(timeit.repeat(run, number=1, repeat=3)) / num_frames
+        rows.append({'points': length, 'metric': name, 'ms_per_frame': seconds * 1e3})
+
+    # vectorized euclidean distance over a batch of frames
+    lhs = pad_trajectories([outputs[i % num_frames] for i in range(batch_size)])
+    rhs = pad_trajectories([expected[i % num_frames] for i in range(batch_size)])
+    seconds = min(
+        timeit.repeat(lambda: batch_euclidean_distance(*lhs, *rhs), number=1, repeat=3)
+    )
+    rows.append(
+        {
+            'points': length,
+            'metric': 'euclidean (batch)',
+            'ms_per_frame': seconds / batch_size * 1e3,
+        }
+    )
+
+df = pd.DataFrame(rows).pivot(index='metric', columns='points', values='ms_per_frame')
+df = df.reindex(metrics + ['euclidean (batch)'])
+print('Per-frame cost (ms) by trajectory length (points)')
+print(df.round(4).to_string())